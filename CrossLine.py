@@ -1,12 +1,72 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import numpy as np
-from copy import deepcopy
+from tkinter import ttk, messagebox, filedialog
+import colorsys
+import json
+import re
 import threading
-import queue
 import time
 
+from CrossLineCLI import read_instances
+from CrossLineSolver import (
+    MatchProblem, SearchStats, State, h_function_method1, search_generator,
+)
+from CrossLinePortfolio import solve_portfolio
+from CrossLineProcess import SearchProcess
+from CrossLineTrace import TraceReader, record_search
+
+# 前 10 条线路使用的固定颜色
+BASE_COLORS = ['#e74c3c', '#2ecc71', '#3498db', '#f1c40f',
+               '#9b59b6', '#1abc9c', '#e67e22', '#34495e',
+               '#2c3e50', '#7f8c8d']
+
+def generate_palette(count):
+    """
+    生成 count 条线路的颜色。
+    前 10 种为固定颜色，其余按黄金角依次旋转色相，并轮换饱和度和明度，
+    相邻编号的线路颜色差别明显，且不会接近空格子的白色。
+    :param count: 线路数量
+    :return: 颜色列表（#rrggbb）
+    """
+    colors = BASE_COLORS[:count]
+    for i in range(len(colors), count):
+        hue = (i * 0.618033988749895) % 1.0
+        saturation = (0.85, 0.6, 0.95)[i % 3]
+        value = (0.8, 0.95, 0.65)[(i // 3) % 3]
+        r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
+        colors.append(f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}")
+    return colors
+
+def parse_pairs(text):
+    """
+    解析线路对文本：每个非空行一对，依次为起点行、起点列、终点行、终点列（从 1 开始），
+    数字之间可用空格、逗号或括号分隔，# 之后为注释。
+    :param text: 线路对文本
+    :return: 线路列表，每个元素为 [起点, 终点]，坐标格式为 [行, 列]（从 1 开始）
+    """
+    pairs = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0]
+        if not line.strip():
+            continue
+        values = [int(value) for value in re.findall(r"-?\d+", line)]
+        if len(values) != 4:
+            raise ValueError(f"Line {number}: expected 4 numbers (start row, start col, "
+                             f"end row, end col), got {len(values)}")
+        pairs.append([values[:2], values[2:]])
+    return pairs
+
 class ModernVisualizer(tk.Tk):
+    # 界面刷新间隔（毫秒），约 30 帧每秒
+    FRAME_INTERVAL = 33
+    # 网格大小和线路数量的上限；网格每格一个字节保存线路编号，线路数量不能超过 255
+    MAX_SIZE = 100
+    MAX_PAIRS = 255
+    # 缩放范围（每格像素数）：适应画布时不超过 FIT_ZOOM，低于 DETAIL_ZOOM 时省略端点和格子边框
+    MIN_ZOOM = 1
+    MAX_ZOOM = 120
+    FIT_ZOOM = 60
+    DETAIL_ZOOM = 12
+
     def __init__(self):
         """
         初始化 ModernVisualizer 类的实例。
@@ -20,22 +80,36 @@ class ModernVisualizer(tk.Tk):
         self.geometry("900x900")  # 稍微增加高度以适应新模式
         self.configure(bg='#f5f6fa')
         
-        # 颜色方案，用于绘制不同的线路
-        self.colors = ['#e74c3c', '#2ecc71', '#3498db', '#f1c40f',
-                      '#9b59b6', '#1abc9c', '#e67e22', '#34495e',
-                      '#2c3e50', '#7f8c8d']
+        # 颜色方案，用于绘制不同的线路，线路更多时由 build_scene 扩展
+        self.colors = generate_palette(len(BASE_COLORS))
         
         self.create_styles()
         self.create_widgets()
         
         # 初始化状态变量
-        self.pair_frames = []  # 存储线路对输入框的框架列表
         self.running = False  # 标记搜索是否正在运行
         self.paused = False  # 标记搜索是否暂停
         self.current_step = 0  # 当前搜索步骤
         self.search_thread = None  # 搜索线程对象
-        self.queue = queue.Queue()  # 用于线程间通信的队列
-        self.delay = 0.1  # 动画延迟时间
+        self.worker = None  # 在子进程中运行的搜索（SearchProcess）
+        self.trace_path = None  # 本次搜索的轨迹文件路径，不录制时为 None
+        self.replay = None  # 回放模式下打开的轨迹（TraceReader）
+        self.replay_position = 0.0  # 回放位置（步号，可为小数以支持低速播放）
+        self.frame_lock = threading.Lock()  # 保护搜索线程发布的最新帧
+        self.latest_node = None  # 搜索线程最近生成的节点，界面只绘制最新的一个
+        self.produced = 0  # 搜索线程已生成的节点数，即精确的步数
+        self.search_done = False  # 搜索线程是否已结束
+        self.max_speed = False  # 最高速度模式：搜索过程中不绘制，只更新计数
+        self.delay = 0.1  # 两次重绘之间的最小间隔（秒），也是组合求解回放每步的间隔
+        self.last_draw = 0.0  # 上次重绘的时间（time.perf_counter）
+        self.stats = None  # 开启性能统计时的 SearchStats 对象
+        self.portfolio_result = None  # 组合求解胜出的结果
+        self.scene = None  # 画布上已创建的元素及其对应的状态，见 build_scene
+        self.zoom = self.FIT_ZOOM  # 视口缩放（每格像素数）
+        self.origin = [0, 0]  # 网格左上角在画布上的坐标
+        self.fitted = True  # 视口是否自动适应画布，缩放或平移后为 False
+        self.drag = None  # 平移时上一次的鼠标位置
+        self.redraw_pending = False  # 是否已安排空闲时重绘
         
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -144,11 +218,6 @@ class ModernVisualizer(tk.Tk):
         self.n_entry.pack(side=tk.LEFT, padx=5)
         self.n_entry.insert(0, "4")
         
-        ttk.Label(grid_frame, text="Pairs (m):", style='Bold.TLabel').pack(side=tk.LEFT, padx=10)
-        self.m_entry = ttk.Entry(grid_frame, width=8, style='Modern.TEntry')
-        self.m_entry.pack(side=tk.LEFT, padx=5)
-        self.m_entry.insert(0, "2")
-        
         # 模式选择
         mode_frame = ttk.Frame(grid_frame)
         mode_frame.pack(side=tk.LEFT, padx=15)
@@ -162,10 +231,29 @@ class ModernVisualizer(tk.Tk):
                  command=self.confirm_input, 
                  style='Success.TButton').pack(side=tk.LEFT, padx=15)
         
-        # 坐标输入区域
+        # 坐标输入区域：每行一个线路对，可直接粘贴，也可从文件导入
         self.pairs_frame = ttk.Frame(self.main_container)
         self.pairs_frame.pack(fill=tk.X, pady=10)
 
+        header = ttk.Frame(self.pairs_frame)
+        header.pack(fill=tk.X)
+        ttk.Label(header, text="Pairs (one per line: start row, start col, end row, end col)",
+                  style='Bold.TLabel').pack(side=tk.LEFT)
+        self.pairs_var = tk.StringVar(value="")
+        ttk.Label(header, textvariable=self.pairs_var,
+                  style='Bold.TLabel').pack(side=tk.LEFT, padx=10)
+        ttk.Button(header, text="Import...", command=self.import_pairs,
+                   style='Primary.TButton').pack(side=tk.RIGHT)
+
+        text_frame = ttk.Frame(self.pairs_frame)
+        text_frame.pack(fill=tk.X, pady=5)
+        self.pairs_text = tk.Text(text_frame, height=5, font=('Courier', 10), relief=tk.FLAT,
+                                  highlightthickness=1, highlightbackground='#bdc3c7')
+        scrollbar = ttk.Scrollbar(text_frame, command=self.pairs_text.yview)
+        self.pairs_text.config(yscrollcommand=scrollbar.set)
+        self.pairs_text.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
     def create_control_section(self):
         """
         创建控制区域的控件。
@@ -202,17 +290,63 @@ class ModernVisualizer(tk.Tk):
                                    orient=tk.HORIZONTAL, command=self.update_speed)
         self.speed_scale.set(50)
         self.speed_scale.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=10)
+        
+        # 回放进度条，打开轨迹文件后才显示，拖动即可跳到任意一步
+        self.replay_frame = ttk.Frame(control_frame)
+        ttk.Label(self.replay_frame, text="Replay Step:", style='Bold.TLabel').pack(side=tk.LEFT)
+        self.replay_var = tk.DoubleVar(value=0)
+        self.replay_scale = ttk.Scale(self.replay_frame, from_=0, to=0, orient=tk.HORIZONTAL,
+                                      variable=self.replay_var, command=self.on_scrub)
+        self.replay_scale.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=10)
+        
+        # 性能统计开关
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_container, text="Profile",
+                        variable=self.profile_var).pack(side=tk.LEFT, padx=8)
+        
+        # 组合求解开关：多个进程并行尝试不同配置，动画回放胜出的解
+        self.portfolio_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_container, text="Portfolio",
+                        variable=self.portfolio_var).pack(side=tk.LEFT, padx=8)
+        
+        # 最高速度开关：搜索全速运行，只更新计数，结束时绘制最终状态
+        self.max_speed_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_container, text="Max Speed",
+                        variable=self.max_speed_var).pack(side=tk.LEFT, padx=8)
+        
+        # 子进程开关：搜索在子进程中运行，通过共享内存传回快照，界面不受搜索负载影响
+        self.process_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_container, text="Subprocess",
+                        variable=self.process_var).pack(side=tk.LEFT, padx=8)
+        
+        # 录制开关：把搜索过程写入轨迹文件；回放按钮打开轨迹文件进入回放模式
+        self.record_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_container, text="Record",
+                        variable=self.record_var).pack(side=tk.LEFT, padx=8)
+        ttk.Button(btn_container, text="Replay...", command=self.open_replay,
+                   style='Primary.TButton').pack(side=tk.LEFT, padx=8)
 
     def create_canvas(self):
         """
         创建用于绘制网格和线路的画布。
+        滚轮以鼠标位置为中心缩放，拖动平移，双击恢复为适应画布的视图。
         """
         canvas_container = ttk.Frame(self.main_container)
         canvas_container.pack(fill=tk.BOTH, expand=True)
-        
+
         self.canvas = tk.Canvas(canvas_container, bg='white', bd=0, highlightthickness=0)
         self.canvas.pack(padx=20, pady=10, fill=tk.BOTH, expand=True)
 
+        # 缩放（Windows/macOS 使用 MouseWheel，X11 使用 Button-4/5）和平移
+        self.canvas.bind("<MouseWheel>", self.on_zoom)
+        self.canvas.bind("<Button-4>", self.on_zoom)
+        self.canvas.bind("<Button-5>", self.on_zoom)
+        self.canvas.bind("<ButtonPress-1>", self.on_drag_start)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_drag_end)
+        self.canvas.bind("<Double-Button-1>", self.on_fit)
+        self.canvas.bind("<Configure>", self.on_resize)
+
     def create_status_bar(self):
         """
         创建状态栏，显示当前搜索步骤和路径成本。
@@ -222,38 +356,31 @@ class ModernVisualizer(tk.Tk):
         
         self.step_var = tk.StringVar(value="Step: 0")
         self.cost_var = tk.StringVar(value="Path Cost: 0")
+        self.stats_var = tk.StringVar(value="")
         
         ttk.Label(self.status_frame, textvariable=self.step_var, 
                  style='Status.TLabel').pack(side=tk.LEFT, padx=15)
+        ttk.Label(self.status_frame, textvariable=self.stats_var,
+                 style='Status.TLabel').pack(side=tk.LEFT, padx=15)
         ttk.Label(self.status_frame, textvariable=self.cost_var, 
                  style='Status.TLabel').pack(side=tk.RIGHT, padx=15)
 
     def confirm_input(self):
         """
-        确认用户输入的网格大小和线路对数量。
-        验证输入的合法性，清除现有线路对输入框，创建新的输入框，
+        确认用户输入的网格大小和线路对。
+        验证网格大小和各线路对坐标的合法性，更新线路数量，
         调整画布大小，并启用控制按钮。
         """
         try:
             n = int(self.n_entry.get())
-            m = int(self.m_entry.get())
-            
-            if n < 2 or n > 10:
-                raise ValueError("Grid size must be between 2 and 10")
-            if m < 1 or m > 10:
-                raise ValueError("Number of pairs must be between 1 and 10")
             
-            # 清除现有的对输入框
-            for frame in self.pair_frames:
-                frame.destroy()
-            self.pair_frames = []
-            
-            # 创建新的对输入框
-            for i in range(m):
-                self.create_pair_input(i)
+            if n < 2 or n > self.MAX_SIZE:
+                raise ValueError(f"Grid size must be between 2 and {self.MAX_SIZE}")
+            init_state = self.get_initial_state()
+            self.pairs_var.set(f"{len(init_state.heads)} pairs")
             
             # 调整画布大小
-            cell_size = min(400 // n, 60)
+            cell_size = max(min(400 // n, self.FIT_ZOOM), self.MIN_ZOOM)
             canvas_size = n * cell_size
             self.canvas.config(width=canvas_size, height=canvas_size)
             
@@ -264,45 +391,47 @@ class ModernVisualizer(tk.Tk):
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
-    def create_pair_input(self, index):
+    def import_pairs(self):
         """
-        创建一个线路对的输入框。
-        包括起点和终点的行、列输入框。
-        :param index: 线路对的索引
-        :return: 起点行、起点列、终点行、终点列的输入框对象
+        从文件导入线路对，然后应用设置。
+        JSON/JSONL 实例文件（与 CrossLineCLI.py 的格式相同，多个实例时取第一个）同时设置网格大小和模式；
+        其他文件按每行一个线路对的文本读取。
         """
-        frame = ttk.Frame(self.pairs_frame, style='Modern.TFrame')
-        frame.pack(fill=tk.X, pady=5)
-        
-        ttk.Label(frame, text=f"Pair {index + 1}", 
-                 style='Modern.TLabel').pack(side=tk.LEFT, padx=5)
-        
-        # 起点输入
-        start_frame = ttk.Frame(frame)
-        start_frame.pack(side=tk.LEFT, padx=20)
-        ttk.Label(start_frame, text="Start:", 
-                 style='Modern.TLabel').pack(side=tk.LEFT)
-        start_row = ttk.Entry(start_frame, width=5)
-        start_row.pack(side=tk.LEFT, padx=2)
-        start_col = ttk.Entry(start_frame, width=5)
-        start_col.pack(side=tk.LEFT, padx=2)
-        
-        # 终点输入
-        end_frame = ttk.Frame(frame)
-        end_frame.pack(side=tk.LEFT, padx=20)
-        ttk.Label(end_frame, text="End:", 
-                 style='Modern.TLabel').pack(side=tk.LEFT)
-        end_row = ttk.Entry(end_frame, width=5)
-        end_row.pack(side=tk.LEFT, padx=2)
-        end_col = ttk.Entry(end_frame, width=5)
-        end_col.pack(side=tk.LEFT, padx=2)
+        path = filedialog.askopenfilename(
+            filetypes=[("Instances", "*.json *.jsonl *.txt"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            try:
+                instance = next(read_instances([path]), None)
+            except json.JSONDecodeError:
+                # 不是 JSON，按线路对文本读取
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                parse_pairs(text)
+            else:
+                if not isinstance(instance, dict):
+                    raise ValueError("The file contains no instance")
+                n = int(instance["n"])
+                mode = instance.get("mode", "mode1")
+                if mode not in ("mode1", "mode2"):
+                    raise ValueError(f"Unknown mode {mode!r}")
+                text = "\n".join(f"{int(start[0])} {int(start[1])} {int(end[0])} {int(end[1])}"
+                                 for start, end in instance["pairs"])
+                self.n_entry.delete(0, tk.END)
+                self.n_entry.insert(0, str(n))
+                self.mode_var.set(mode)
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            messagebox.showerror("Error", f"Cannot import {path}: {e}")
+            return
         
-        self.pair_frames.append(frame)
-        return start_row, start_col, end_row, end_col
+        self.pairs_text.delete("1.0", tk.END)
+        self.pairs_text.insert("1.0", text)
+        self.confirm_input()
 
     def update_speed(self, value):
         """
-        根据速度滑块的值更新动画延迟时间。
+        根据速度滑块的值更新重绘间隔。搜索本身始终全速运行，滑块只决定界面多久绘制一次最新状态。
         :param value: 速度滑块的值
         """
         self.delay = (100 - float(value)) / 100
@@ -310,33 +439,48 @@ class ModernVisualizer(tk.Tk):
     def toggle_pause(self):
         """
         切换搜索的暂停和继续状态。
-        更新暂停按钮的文本。
+        更新暂停按钮的文本；子进程搜索通过控制管道暂停或继续。
         """
         self.paused = not self.paused
         self.pause_btn.config(text="Resume" if self.paused else "Pause")
+        if self.worker is not None:
+            if self.paused:
+                self.worker.pause()
+            else:
+                self.worker.resume()
+
+    def stop_worker(self):
+        """
+        取消子进程搜索并释放其共享内存。
+        """
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
 
     def reset(self):
         """
         重置搜索状态。
-        停止搜索线程，清空队列，重置状态变量，
+        停止搜索线程或子进程，退出回放模式，清除已发布的帧，重置状态变量，
         重绘画布为初始状态。
         """
         if self.running:
             self.running = False
             if self.search_thread and self.search_thread.is_alive():
                 self.search_thread.join()
+        self.stop_worker()
+        self.close_replay()
         
-        # 清空队列
-        with self.queue.mutex:
-            self.queue.queue.clear()
-        
+        self.clear_frames()
         self.current_step = 0
         self.step_var.set("Step: 0")
         self.cost_var.set("Path Cost: 0")
+        self.stats_var.set("")
+        self.stats = None
+        self.portfolio_result = None
         self.paused = False
         self.pause_btn.config(text="Pause", state=tk.DISABLED)
         self.start_btn.config(state=tk.NORMAL)
-        self.last_node = None  # 新增状态重置
+        self.last_state = None
         
         # 重绘画布
         self.draw_initial_state()
@@ -344,35 +488,71 @@ class ModernVisualizer(tk.Tk):
     def start_search(self):
         """
         开始搜索过程。
-        获取用户输入，验证其合法性，清空队列，
-        设置问题并启动搜索线程，开始处理队列中的节点。
+        获取用户输入，验证其合法性，清除已发布的帧，
+        设置问题并启动搜索线程（或子进程），开始按固定帧率处理发布的节点。
+        回放模式下改为从当前位置开始播放轨迹。
         """
+        if self.replay is not None:
+            self.play_replay()
+            return
         try:
             # 获取输入并验证
             n = int(self.n_entry.get())
             init_state = self.get_initial_state()
             
-            # 清空之前的队列数据
-            with self.queue.mutex:
-                self.queue.queue.clear()
+            # 清空之前发布的帧
+            self.clear_frames()
+            
+            # 界面搜索使用曼哈顿距离启发函数：每次计算只需线性时间，且在两种模式下都可采纳
+            h_function = h_function_method1
             
             # 设置问题并开始搜索（新增模式参数）
             self.problem = MatchProblem(
                 n, 
                 init_state, 
-                h_function=h_function_method1, 
-                path_cost=int(self.m_entry.get()),
+                h_function=h_function, 
+                path_cost=len(init_state.heads),
                 mode=self.mode_var.get()  # 新增模式参数
             )
             
+            self.stats = SearchStats() if self.profile_var.get() else None
+            self.stats_var.set("")
+            self.portfolio_result = None
+            self.max_speed = self.max_speed_var.get()
+            self.current_step = 0
+            self.last_state = None
+            self.last_draw = 0.0
+            
             self.running = True
             self.start_btn.config(state=tk.DISABLED)
             self.pause_btn.config(state=tk.NORMAL)
             
-            self.search_thread = threading.Thread(target=self.run_search)
-            self.search_thread.start()
+            if self.portfolio_var.get():
+                # 组合求解在工作进程中进行，不记录单次搜索的统计信息
+                self.stats = None
+                self.stats_var.set("Portfolio running...")
+                instance = self.get_instance(init_state)
+                self.search_thread = threading.Thread(target=self.run_portfolio, args=(instance,))
+                self.search_thread.start()
+            elif self.process_var.get():
+                # 统计信息随每一帧从子进程传回
+                self.search_thread = None
+                self.worker = SearchProcess(
+                    n, init_state.lines(), self.mode_var.get(),
+                    path_cost=len(init_state.heads),
+                    h_function=h_function,
+                    profile=self.stats is not None
+                )
+            else:
+                self.trace_path = None
+                if self.record_var.get():
+                    self.trace_path = filedialog.asksaveasfilename(
+                        defaultextension=".trace",
+                        filetypes=[("Search trace", "*.trace"), ("All files", "*.*")]) or None
+                self.search_thread = threading.Thread(target=self.run_search)
+                self.search_thread.start()
             
-            self.after(100, self.process_queue)
+            self.after(self.FRAME_INTERVAL, self.process_frames)
             
         except ValueError as e:
             messagebox.showerror("Error", str(e))
@@ -380,690 +560,527 @@ class ModernVisualizer(tk.Tk):
     def get_initial_state(self):
         """
         获取初始状态。
-        从用户输入的线路对坐标创建网格和线路列表，
-        找到第一个未完成的线路作为活动线路。
-        :return: 初始状态列表，包含网格、线路列表和活动线路索引
+        从线路对文本解析各线路的坐标并创建初始状态。
+        :return: 初始状态（State）
         """
         n = int(self.n_entry.get())
-        grid = [[0 for _ in range(n)] for _ in range(n)]
+        pairs = parse_pairs(self.pairs_text.get("1.0", tk.END))
+        if len(pairs) < 1 or len(pairs) > self.MAX_PAIRS:
+            raise ValueError(f"Number of pairs must be between 1 and {self.MAX_PAIRS}")
         lines = []
-        for i, frame in enumerate(self.pair_frames):
-            entries = frame.winfo_children()
-            start_row = int(entries[1].winfo_children()[1].get()) - 1
-            start_col = int(entries[1].winfo_children()[2].get()) - 1
-            end_row = int(entries[2].winfo_children()[1].get()) - 1
-            end_col = int(entries[2].winfo_children()[2].get()) - 1
+        for i, (start, end) in enumerate(pairs):
+            start_row, start_col = start[0] - 1, start[1] - 1
+            end_row, end_col = end[0] - 1, end[1] - 1
             
             if not (0 <= start_row < n and 0 <= start_col < n and 
                    0 <= end_row < n and 0 <= end_col < n):
                 raise ValueError(f"Invalid coordinates for pair {i+1}")
             
             lines.append([[start_row, start_col], [end_row, end_col]])
-            grid[start_row][start_col] = i + 1
-            grid[end_row][end_col] = i + 1
         
-        # 找到第一个未完成的线路作为active_line
-        active_line = None
-        for idx, (start, end) in enumerate(lines):
-            if start != end:
-                active_line = idx
-                break
-        return [grid, lines, active_line]
+        return State.initial(n, lines)
+
+    def get_instance(self, init_state):
+        """
+        将初始状态转换为组合求解使用的实例字典（坐标从 1 开始）。
+        :param init_state: 初始状态
+        :return: 实例字典
+        """
+        pairs = [[[sr + 1, sc + 1], [er + 1, ec + 1]]
+                 for (sr, sc), (er, ec) in init_state.lines()]
+        return {"n": init_state.n, "mode": self.mode_var.get(), "pairs": pairs}
+
+    def run_portfolio(self, instance):
+        """
+        运行组合求解，然后按动画速度逐步回放胜出的解。
+        回放时的节点由当前问题对象逐个生成，与普通搜索显示的信息一致。
+        结束后调用 finish_frames 表示结束。
+        :param instance: 实例字典
+        """
+        result = solve_portfolio(instance, stop=lambda: not self.running)
+        self.portfolio_result = result
+        if result is not None and result["solved"]:
+            node = self.problem.init_state
+            self.publish(node)
+            for action in result["actions"]:
+                while self.paused and self.running:
+                    time.sleep(0.1)
+                if not self.running:
+                    break
+                node = node.child_node(self.problem, tuple(action))
+                self.publish(node)
+                if not self.max_speed:
+                    time.sleep(self.delay)
+        self.finish_frames()
 
     def run_search(self):
         """
         运行搜索过程。
-        使用搜索生成器生成节点，将节点放入队列，
-        根据暂停状态和延迟时间控制节点的生成速度。
-        搜索结束后，将 None 放入队列表示结束。
+        使用搜索生成器生成节点，每个节点只发布为最新帧而不排队；搜索全速运行，只在暂停时等待，
+        界面按速度滑块的间隔取样绘制（见 process_frames）。
+        开启录制时同时把每个节点写入轨迹文件。搜索结束后，调用 finish_frames 表示结束。
         """
-        gen = search_generator(self.problem)
+        if self.trace_path:
+            gen = record_search(self.problem, self.trace_path, self.stats)
+        else:
+            gen = search_generator(self.problem, self.stats)
         for node in gen:
+            if node is None:
+                break
             while self.paused and self.running:
                 time.sleep(0.1)
             if not self.running:
                 break
-            self.queue.put(node)
-            time.sleep(self.delay)
-        self.queue.put(None)
-
-    def process_queue(self):
-        """
-        处理队列中的节点。
-        从队列中获取节点，更新状态信息，绘制节点状态，
-        直到队列为空或搜索结束。
-        """
-        try:
-            while True:
-                node = self.queue.get_nowait()
-                if node is None:
-                    self.running = False
-                    self.pause_btn.config(state=tk.DISABLED)
-                    # 添加对last_node的存在性检查
-                    if self.last_node and self.problem.is_goal(self.last_node.state):
-                        messagebox.showinfo("Success", "Solution found!")
-                    else:
-                        messagebox.showinfo("Info", "No solution found.")
-                    break
-                
-                self.last_node = node
-                self.current_step += 1
-                self.step_var.set(f"Step: {self.current_step}")
-                self.cost_var.set(f"Path Cost: {node.path_cost:.2f}")
-                self.draw_state(node.state)
-                
-        except queue.Empty:
-            pass
-        
-        if self.running:
-            self.after(100, self.process_queue)
+            self.publish(node)
+        gen.close()  # 提前停止时也写完轨迹文件
+        self.finish_frames()
 
-    def draw_state(self, state):
+    def publish(self, node):
         """
-        绘制当前状态的网格和线路。
-        清空画布，绘制网格、线路的起点、终点和连接线。
-        :param state: 当前状态列表，包含网格、线路列表和活动线路索引
+        由工作线程调用，发布最新生成的节点并累加步数。
+        只保留最新的节点，界面来不及绘制的中间节点直接丢弃，计数仍然精确。
+        :param node: 节点
         """
-        self.canvas.delete("all")
-        n = len(state[0])
-        cell_size = min(int(self.canvas.winfo_width() / n), 60)
-        
-        # 绘制网格
-        for i in range(n):
-            for j in range(n):
-                x, y = j * cell_size, i * cell_size
-                value = state[0][i][j]
-                color = self.colors[value-1] if value > 0 else '#ffffff'
-                self.canvas.create_rectangle(
-                    x, y, x + cell_size, y + cell_size,
-                    fill=color, outline='#ecf0f1', width=2
-                )
-        
-        # 绘制连接线和端点
-        for idx, (start, end) in enumerate(state[1]):
-            color = self.colors[idx]
-            
-            # 起点
-            sx = start[1] * cell_size + cell_size/2
-            sy = start[0] * cell_size + cell_size/2
-            self.canvas.create_oval(
-                sx-10, sy-10, sx+10, sy+10,
-                fill=color, outline='#2c3e50', width=2
-            )
-            
-            # 终点
-            ex = end[1] * cell_size + cell_size/2
-            ey = end[0] * cell_size + cell_size/2
-            self.canvas.create_rectangle(
-                ex-10, ey-10, ex+10, ey+10,
-                outline=color, width=2, fill='white'
-            )
-            
-            # 路径线
-            if start != end:
-                self.canvas.create_line(
-                    sx, sy, ex, ey,
-                    fill=color, width=3, capstyle=tk.ROUND,
-                    dash=(6,4) if idx % 2 == 0 else (4,2)
-                )
+        with self.frame_lock:
+            self.latest_node = node
+            self.produced += 1
 
-    def draw_initial_state(self):
+    def finish_frames(self):
         """
-        绘制初始状态。
-        尝试获取初始状态并绘制，如果输入无效则忽略。
+        由工作线程调用，表示不会再发布新的节点。
         """
-        try:
-            init_state = self.get_initial_state()
-            self.draw_state(init_state)
-        except ValueError:
-            pass
+        with self.frame_lock:
+            self.search_done = True
 
-    def on_close(self):
+    def clear_frames(self):
         """
-        处理窗口关闭事件。
-        停止搜索线程，销毁窗口。
+        清除已发布的帧，在工作线程结束后调用。
         """
-        self.running = False
-        if self.search_thread and self.search_thread.is_alive():
-            self.search_thread.join()
-        self.destroy()
+        with self.frame_lock:
+            self.latest_node = None
+            self.produced = 0
+            self.search_done = False
 
-class PriorityQueue:
-    def __init__(self, initial=None):
-        """
-        初始化优先队列。
-        :param initial: 初始元素
-        """
-        self.elements = []
-        if initial:
-            self.push(initial)
+    def read_frame(self):
+        """
+        读取搜索线程或子进程发布的最新帧。子进程的帧中带有统计信息时替换 self.stats。
+        子进程已退出（例如被终止）时，即使最后一帧未标记结束也视为结束，避免一直轮询。
+        :return: (状态, 路径成本, 步数, 是否结束)，尚无节点时状态为 None
+        """
+        if self.worker is not None:
+            # 先判断子进程是否存活再读帧：已退出时读到的一定是它写下的最后一帧
+            alive = self.worker.is_alive()
+            frame = self.worker.latest()
+            if frame is None:
+                return None, 0, 0, not alive
+            if frame["stats"] is not None:
+                self.stats = frame["stats"]
+            return frame["state"], frame["path_cost"], frame["step"], frame["done"] or not alive
+        with self.frame_lock:
+            node, produced, done = self.latest_node, self.produced, self.search_done
+        if node is None:
+            return None, 0, produced, done
+        return node.state, node.path_cost, produced, done
 
-    def empty(self):
-        """
-        判断队列是否为空。
-        :return: 队列为空返回 True，否则返回 False
+    def process_frames(self):
         """
-        return len(self.elements) == 0
-
-    def push(self, item):
+        以固定帧率取出最新的帧，更新步数、成本和统计信息。
+        网格按速度滑块决定的间隔（self.delay）取样重绘，期间生成的节点只计入步数，不逐个绘制；
+        最高速度模式下只更新计数。搜索结束后总是绘制最终状态。
         """
-        向队列中添加元素，并按路径成本排序。
-        :param item: 要添加的元素
-        """
-        self.elements.append(item)
-        self.elements.sort(key=lambda x: x.path_cost)
-
-    def pop(self):
-        """
-        从队列中移除并返回路径成本最小的元素。
-        :return: 路径成本最小的元素
-        """
-        return self.elements.pop(0)
+        state, path_cost, produced, done = self.read_frame()
+        
+        if produced != self.current_step and state is not None:
+            self.last_state = state
+            self.current_step = produced
+            self.step_var.set(f"Step: {self.current_step}")
+            self.cost_var.set(f"Path Cost: {path_cost:.2f}")
+            if self.stats is not None:
+                self.stats_var.set(f"Generated: {self.stats.generated}  "
+                                   f"Open peak: {self.stats.open_peak}")
+            now = time.perf_counter()
+            if not self.max_speed and now - self.last_draw >= self.delay:
+                self.draw_state(state)
+                self.last_draw = now
+        
+        if done:
+            self.running = False
+            self.stop_worker()
+            self.pause_btn.config(state=tk.DISABLED)
+            if self.last_state is not None:
+                self.draw_state(self.last_state)
+            report = "\n\n" + self.stats.summary() if self.stats is not None else ""
+            result = self.portfolio_result
+            if result is not None:
+                config = result["config"]
+                report += (f"\n\nPortfolio winner: {config['heuristic']}, "
+                           f"tie-break {config['tie_break']}, order {config['order']}"
+                           f"\nExpanded: {result['expansions']}  "
+                           f"Time: {result['wall_time']:.2f}s")
+                self.stats_var.set("")
+            if self.last_state and self.problem.is_goal(self.last_state):
+                messagebox.showinfo("Success", "Solution found!" + report)
+            else:
+                messagebox.showinfo("Info", "No solution found." + report)
+            return
+        
+        if self.running:
+            self.after(self.FRAME_INTERVAL, self.process_frames)
 
-    def find(self, item):
+    def open_replay(self):
         """
-        查找元素在队列中的索引。
-        :param item: 要查找的元素
-        :return: 元素的索引，如果未找到返回 -1
+        选择轨迹文件并进入回放模式。
+        回放不重新运行搜索：拖动进度条跳到任意一步，开始按钮按速度滑块的速度播放。
         """
-        for i, e in enumerate(self.elements):
-            if e == item:
-                return i
-        return -1
+        path = filedialog.askopenfilename(
+            filetypes=[("Search trace", "*.trace"), ("All files", "*.*")])
+        if not path:
+            return
+        self.reset()
+        try:
+            replay = TraceReader(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if len(replay) == 0:
+            replay.close()
+            messagebox.showerror("Error", "The trace is empty")
+            return
+        
+        self.replay = replay
+        self.problem = replay.problem
+        self.replay_scale.config(to=len(replay) - 1)
+        self.replay_frame.pack(fill=tk.X, padx=50, pady=(0, 10))
+        self.seek(0)
 
-    def compare_and_replace(self, index, new_item):
+    def close_replay(self):
         """
-        如果新元素的路径成本更小，则替换队列中指定索引的元素。
-        :param index: 要替换的元素的索引
-        :param new_item: 新元素
+        退出回放模式，关闭轨迹文件并隐藏进度条。
         """
-        if 0 <= index < len(self.elements):
-            if new_item.path_cost < self.elements[index].path_cost:
-                self.elements[index] = new_item
-                self.elements.sort(key=lambda x: x.path_cost)
+        if self.replay is not None:
+            self.replay.close()
+            self.replay = None
+            self.replay_frame.pack_forget()
 
-class Set:
-    def __init__(self):
-        """
-        初始化集合。
-        """
-        self.elements = []
+    def seek(self, step):
+        """
+        跳到回放的指定步，重建并绘制该步的状态，显示其 g、h 和开放表长度。
+        :param step: 步号（从 0 开始）
+        """
+        self.replay_position = step
+        self.replay_var.set(step)
+        record = self.replay.record(step)
+        self.step_var.set(f"Step: {step + 1}/{len(self.replay)}")
+        self.cost_var.set(f"Path Cost: {record['f']:.2f}")
+        self.stats_var.set(f"g: {record['g']:.0f}  h: {record['h']:.0f}  "
+                           f"Open: {record['open_size']}")
+        self.draw_state(self.replay.state(step))
 
-    def add(self, item):
+    def on_scrub(self, value):
         """
-        向集合中添加元素，如果元素不存在。
-        :param item: 要添加的元素
+        拖动回放进度条时跳到对应的步。
+        :param value: 进度条的值
         """
-        if item not in self.elements:
-            self.elements.append(item)
+        if self.replay is not None:
+            self.seek(int(float(value)))
 
-    def include(self, item):
+    def play_replay(self):
         """
-        判断集合中是否包含指定元素。
-        :param item: 要判断的元素
-        :return: 包含返回 True，否则返回 False
+        从当前位置开始播放轨迹。
         """
-        return item in self.elements
-
-def Manhattan_distance(loc1, loc2):
-    """
-    计算两个位置之间的曼哈顿距离。
-    :param loc1: 第一个位置，格式为 [行, 列]
-    :param loc2: 第二个位置，格式为 [行, 列]
-    :return: 曼哈顿距离
-    """
-    return abs(loc1[0] - loc2[0]) + abs(loc1[1] - loc2[1])
-
-def h_function_null(state):
-    """
-    空启发函数，始终返回 0。
-    :param state: 当前状态
-    :return: 0
-    """
-    return 0
-
-def h_function_method1(state):
-    """
-    启发函数方法 1，计算所有线路起点到终点的曼哈顿距离之和。
-    :param state: 当前状态，包含网格、线路列表和活动线路索引
-    :return: 曼哈顿距离之和
-    """
-    ans = 0
-    for i in range(len(state[1])):
-        ans += Manhattan_distance(state[1][i][0], state[1][i][1])
-    return ans
-
-def generate_horizontal_path(start, end):
-    """
-    生成横向优先的曼哈顿路径。
-    先横向移动，再纵向移动。
-    :param start: 起点，格式为 [行, 列]
-    :param end: 终点，格式为 [行, 列]
-    :return: 路径列表，每个元素为 [行, 列]
-    """
-    path = []
-    sx, sy = start
-    ex, ey = end
-    
-    # 横向移动（X轴）
-    step_x = 1 if ex > sx else -1
-    for x in range(sx, ex, step_x):
-        path.append((x, sy))
-    path.append((ex, sy))
-    
-    # 纵向移动（Y轴）
-    step_y = 1 if ey > sy else -1
-    for y in range(sy, ey, step_y):
-        path.append((ex, y))
-    return path
-
-def generate_vertical_path(start, end):
-    """
-    生成纵向优先的曼哈顿路径。
-    先纵向移动，再横向移动。
-    :param start: 起点，格式为 [行, 列]
-    :param end: 终点，格式为 [行, 列]
-    :return: 路径列表，每个元素为 [行, 列]
-    """
-    path = []
-    sx, sy = start
-    ex, ey = end
-    
-    # 纵向移动（Y轴）
-    step_y = 1 if ey > sy else -1
-    for y in range(sy, ey, step_y):
-        path.append((sx, y))
-    path.append((sx, ey))
-    
-    # 横向移动（X轴）
-    step_x = 1 if ex > sx else -1
-    for x in range(sx, ex, step_x):
-        path.append((x, ey))
-    return path
-
-def count_obstacles(grid, path, end, line_idx):
-    """
-    统计路径中其他线路的障碍物数量。
-    排除终点和当前线路自身的路径。
-    :param grid: 网格
-    :param path: 路径列表，每个元素为 [行, 列]
-    :param end: 终点，格式为 [行, 列]
-    :param line_idx: 当前线路的索引
-    :return: 障碍物数量
-    """
-    count = 0
-    line_value = line_idx + 1  # 当前线路在grid中的标识
-    for (x, y) in path:
-        # 排除终点和当前线路自身的路径
-        if (x, y) == end or grid[x][y] == line_value:
-            continue
-        if grid[x][y] != 0:  # 被其他线路占据
-            count += 1
-    return count
+        if self.replay_position >= len(self.replay) - 1:
+            self.seek(0)
+        self.running = True
+        self.paused = False
+        self.start_btn.config(state=tk.DISABLED)
+        self.pause_btn.config(text="Pause", state=tk.NORMAL)
+        self.after(self.FRAME_INTERVAL, self.process_replay)
 
-def h_function_method2(state):
-    """
-    改进的启发函数：曼哈顿距离 + 障碍物惩罚。
-    对于每条未完成的线路，计算其曼哈顿距离和障碍物最少的路径的障碍物数量，
-    并将障碍物数量乘以惩罚系数（2）加到曼哈顿距离上。
-    :param state: 当前状态，包含网格、线路列表和活动线路索引
-    :return: 启发函数值
-    """
-    grid = state[0]
-    lines = state[1]
-    total = 0
-    
-    for line_idx, (start, end) in enumerate(lines):
-        if start == end:
-            continue  # 线路已完成
-        
-        # 基础曼哈顿距离
-        md = Manhattan_distance(start, end)
-        
-        # 生成两种曼哈顿路径
-        path_h = generate_horizontal_path(start, end)
-        path_v = generate_vertical_path(start, end)
-        
-        # 计算障碍物数量
-        obstacles_h = count_obstacles(grid, path_h, end, line_idx)
-        obstacles_v = count_obstacles(grid, path_v, end, line_idx)
-        
-        # 取障碍较少的路径，并添加惩罚（每个障碍+2）
-        min_obstacles = min(obstacles_h, obstacles_v)
-        total += md + 2 * min_obstacles
-    
-    return total
+    def process_replay(self):
+        """
+        以固定帧率推进回放。速度滑块的值 v 对应每秒 10^(v/25) 步（约 1 到 10000 步），
+        每帧只绘制到达的那一步，中间的步直接跳过。
+        """
+        if not self.running or self.replay is None:
+            return
+        if not self.paused:
+            rate = 10 ** (float(self.speed_scale.get()) / 25)
+            position = self.replay_position + rate * self.FRAME_INTERVAL / 1000
+            last = len(self.replay) - 1
+            if int(position) != int(self.replay_position) or position >= last:
+                self.seek(min(int(position), last))
+            self.replay_position = min(position, last)
+            if self.replay_position >= last:
+                self.running = False
+                self.start_btn.config(state=tk.NORMAL)
+                self.pause_btn.config(state=tk.DISABLED)
+                return
+        self.after(self.FRAME_INTERVAL, self.process_replay)
 
-class Node(object):
-    def __init__(self, state, parent=None, action=None, path_cost=0, directions=None, depth=0):
+    def draw_state(self, state):
         """
-        初始化节点对象。
+        绘制当前状态的网格和线路（保留模式）。
+        画布元素在每个实例、缩放或可见范围改变时由 build_scene 创建一次，
+        之后只更新与上次绘制的状态相比占用改变的可见格子和起点移动过的线路，
+        每帧的耗时与变化量成正比，而不是与 n² 成正比。新实例先把视口适应画布。
         :param state: 当前状态
-        :param parent: 父节点
-        :param action: 导致当前状态的动作
-        :param path_cost: 从初始状态到当前状态的路径成本
-        :param directions: 各线路的最后移动方向，字典格式 {线路索引: 方向}
-        :param depth: 节点的深度
-        """
-        self.state = state
-        self.parent = parent
-        self.action = action
-        self.path_cost = path_cost
-        self.depth = path_cost
-        # 使用字典记录各线路的最后方向 {line_index: direction}
-        self.directions = directions if directions is not None else {}
-        if parent:
-            self.depth = depth
-
-    def child_node(self, problem, action):
-        """
-        根据当前节点和动作生成子节点。
-        计算新的状态、路径成本、移动方向等信息。
-        :param problem: 问题对象
-        :param action: 动作，格式为 [线路索引, 新位置]
-        :return: 子节点对象
         """
-        next_state = problem.move(self.state, action)
-        line_idx, new_loc = action
-        original_start = self.state[1][line_idx][0]
-        
-        # 计算移动方向
-        delta_row = new_loc[0] - original_start[0]
-        delta_col = new_loc[1] - original_start[1]
-        
-        if delta_row == -1:
-            current_direction = 'up'
-        elif delta_row == 1:
-            current_direction = 'down'
-        elif delta_col == 1:
-            current_direction = 'right'
-        elif delta_col == -1:
-            current_direction = 'left'
-        else:
-            current_direction = None
+        n = state.n
+        scene = self.scene
+        if scene is None or scene["n"] != n or scene["ends"] != state.ends:
+            self.fit_view(n)
+            self.build_scene(state)
+            return
+        if scene["zoom"] != self.zoom or scene["range"] != self.visible_range(n):
+            self.build_scene(state)
+            return
         
-        # 复制父节点的方向记录并更新当前线路
-        new_directions = self.directions.copy()
-        new_directions[line_idx] = current_direction
+        # 两个网格按字节异或，逐个取出不为 0 的字节，即占用改变的格子；视口外的格子没有元素
+        old = scene["state"]
+        cells = scene["cells"]
+        diff = int.from_bytes(state.grid, "little") ^ int.from_bytes(old.grid, "little")
+        while diff:
+            cell = (diff.bit_length() - 1) >> 3
+            diff &= ~(0xFF << (cell * 8))
+            item = cells.get(cell)
+            if item is not None:
+                value = state.grid[cell]
+                self.canvas.itemconfig(item, fill=self.colors[value-1] if value > 0 else '#ffffff')
         
-        # 计算新路径成本
-        new_cost = problem.g(self, action, next_state, line_idx, current_direction) + problem.h(next_state)
-        new_depth = problem.g(self, action, next_state, line_idx, current_direction)
+        # 移动起点和路径线
+        radius = scene["radius"]
+        for idx, head in enumerate(state.heads):
+            if head == old.heads[idx]:
+                continue
+            end = state.ends[idx]
+            sx, sy, ex, ey = self.line_coords(head, end, n)
+            if scene["starts"]:
+                self.canvas.coords(scene["starts"][idx],
+                                   sx-radius, sy-radius, sx+radius, sy+radius)
+            self.canvas.coords(scene["paths"][idx], sx, sy, ex, ey)
+            self.canvas.itemconfig(scene["paths"][idx],
+                                   state=tk.HIDDEN if head == end else tk.NORMAL)
         
-        return Node(
-            next_state, 
-            self, 
-            action, 
-            new_cost,
-            new_directions,
-            new_depth
-        )
+        scene["state"] = state
 
-    def path(self):
+    def line_coords(self, head, end, n):
         """
-        从当前节点回溯到初始节点的路径。
-        :return: 节点列表，从初始节点到当前节点
+        计算线路起点和终点所在格子中心在当前视口中的画布坐标。
+        :param head: 起点（编码后的格子）
+        :param end: 终点（编码后的格子）
+        :param n: 网格大小
+        :return: (起点 x, 起点 y, 终点 x, 终点 y)
         """
-        node, path_back = self, []
-        while node:
-            path_back.append(node)
-            node = node.parent
-        return list(reversed(path_back))
-
-    def __repr__(self):
-        """
-        返回节点状态的字符串表示。
-        :return: 节点状态的字符串表示
-        """
-        state_map = self.state[0]
-        ans = "##########\n"
-        n = len(state_map)
-        for i in range(n):
-            for j in range(n):
-                ans += str(state_map[i][j]) + " "
-            ans += "\n"
-        ans += "##########\n"
-        return ans
+        (hr, hc), (er, ec) = divmod(head, n), divmod(end, n)
+        zoom = self.zoom
+        ox, oy = self.origin
+        return (ox + (hc + 0.5) * zoom, oy + (hr + 0.5) * zoom,
+                ox + (ec + 0.5) * zoom, oy + (er + 0.5) * zoom)
 
-    def __lt__(self, other):
+    def canvas_size(self):
         """
-        比较两个节点的路径成本。
-        :param other: 另一个节点
-        :return: 当前节点的路径成本小于另一个节点返回 True，否则返回 False
+        获取画布的显示大小，画布尚未显示时使用其请求的大小。
+        :return: (宽度, 高度)
         """
-        return self.path_cost < other.path_cost
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = self.canvas.winfo_reqwidth(), self.canvas.winfo_reqheight()
+        return width, height
 
-    def __eq__(self, other):
+    def visible_range(self, n):
         """
-        比较两个节点的状态是否相等。
-        :param other: 另一个节点
-        :return: 状态相等返回 True，否则返回 False
+        计算当前视口中可见（含部分可见）的行列范围。
+        :param n: 网格大小
+        :return: (起始行, 结束行, 起始列, 结束列)，不含结束行列
         """
-        return self.state == other.state
+        width, height = self.canvas_size()
+        ox, oy = self.origin
+        zoom = self.zoom
+        return (max(0, int(-oy // zoom)), min(n, int((height - oy) // zoom) + 1),
+                max(0, int(-ox // zoom)), min(n, int((width - ox) // zoom) + 1))
 
-class Problem(object):
-    def __init__(self, init_state=None, h_function=None, path_cost=0):
+    def fit_view(self, n):
         """
-        初始化问题对象。
-        :param init_state: 初始状态
-        :param h_function: 启发函数
-        :param path_cost: 初始路径成本
+        缩放视口使整个网格适应画布，每格不超过 FIT_ZOOM 像素。
+        :param n: 网格大小
         """
-        self.init_state = Node(init_state, path_cost=path_cost)
-        self.h = h_function
+        width, height = self.canvas_size()
+        self.zoom = max(min(min(width, height) // n, self.FIT_ZOOM), self.MIN_ZOOM)
+        self.origin = [0, 0]
+        self.fitted = True
 
-    def actions(self, state):
+    def schedule_redraw(self):
         """
-        获取当前状态下的可用动作。
-        子类需要实现该方法。
-        :param state: 当前状态
-        :return: 可用动作列表
+        在界面空闲时重绘一次；连续的缩放、平移和窗口大小事件合并为一次重绘。
         """
-        pass
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self.redraw)
 
-    def move(self, state, action):
+    def redraw(self):
         """
-        根据动作移动到下一个状态。
-        子类需要实现该方法。
-        :param state: 当前状态
-        :param action: 动作
-        :return: 下一个状态
+        按当前视口重绘上次绘制的状态，可见范围和缩放都未改变时不做任何操作。
         """
-        pass
+        self.redraw_pending = False
+        if self.scene is not None:
+            self.draw_state(self.scene["state"])
+
+    def on_zoom(self, event):
+        """
+        滚轮缩放，保持鼠标所指的位置不动。
+        :param event: 滚轮事件
+        """
+        factor = 1.25 if event.num == 4 or getattr(event, "delta", 0) > 0 else 1 / 1.25
+        zoom = min(max(self.zoom * factor, self.MIN_ZOOM), self.MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        ox, oy = self.origin
+        self.origin = [event.x - (event.x - ox) * zoom / self.zoom,
+                       event.y - (event.y - oy) * zoom / self.zoom]
+        self.zoom = zoom
+        self.fitted = False
+        self.schedule_redraw()
 
-    def is_goal(self, state):
+    def on_drag_start(self, event):
         """
-        判断当前状态是否为目标状态。
-        子类需要实现该方法。
-        :param state: 当前状态
-        :return: 是目标状态返回 True，否则返回 False
+        开始拖动平移。
+        :param event: 鼠标按下事件
         """
-        pass
+        self.drag = (event.x, event.y)
+
+    def on_drag(self, event):
+        """
+        拖动时直接移动画布上的所有元素，不重建。
+        :param event: 鼠标移动事件
+        """
+        if self.drag is None:
+            return
+        dx, dy = event.x - self.drag[0], event.y - self.drag[1]
+        self.drag = (event.x, event.y)
+        self.canvas.move("all", dx, dy)
+        self.origin = [self.origin[0] + dx, self.origin[1] + dy]
+        self.fitted = False
 
-    def g(self, cost, from_state, action, to_state):
+    def on_drag_end(self, event):
         """
-        计算从一个状态到另一个状态的路径成本。
-        子类需要实现该方法。
-        :param cost: 当前路径成本
-        :param from_state: 起始状态
-        :param action: 动作
-        :param to_state: 目标状态
-        :return: 路径成本
+        结束拖动，为新进入视口的格子重建画布元素。
+        :param event: 鼠标释放事件
         """
-        pass
+        self.drag = None
+        self.schedule_redraw()
 
-    def solution(self, goal):
+    def on_fit(self, event):
         """
-        获取从初始状态到目标状态的解决方案。
-        :param goal: 目标节点
-        :return: 动作列表，从初始状态到目标状态的解决方案
+        双击恢复为适应画布的视图。
+        :param event: 双击事件
         """
-        if goal.state is None:
-            return None
-        return [node.action for node in goal.path()[1:]]
+        if self.scene is not None:
+            self.fit_view(self.scene["n"])
+            self.schedule_redraw()
 
-    def expand(self, node):
+    def on_resize(self, event):
         """
-        扩展节点，生成所有可能的子节点。
-        :param node: 当前节点
-        :return: 子节点列表
+        画布大小改变时重绘；视口未被手动缩放或平移时重新适应画布。
+        :param event: 画布的 Configure 事件
         """
-        return [node.child_node(self, action) for action in self.actions(node.state)]
+        if self.scene is not None:
+            if self.fitted:
+                self.fit_view(self.scene["n"])
+            self.schedule_redraw()
 
-class MatchProblem(Problem):
-    def __init__(self, n, init_state, h_function=h_function_null, path_cost=0, mode="mode1"):
+    def build_scene(self, state):
         """
-        初始化线路匹配问题对象。
-        :param n: 网格大小
-        :param init_state: 初始状态，包含网格、线路列表和活动线路索引
-        :param h_function: 启发函数，默认为 h_function_null
-        :param path_cost: 初始路径成本
-        :param mode: 搜索模式，默认为 "mode1"
-        """
-        super().__init__(init_state, h_function, path_cost)
-        self.n = n
-        self.mode = mode
-
-    def g(self, parent_node, action, to_state, line_idx, current_direction):
-        """
-        计算从父节点通过某个动作到达新状态的路径成本。
-        :param parent_node: 父节点
-        :param action: 动作，包含线路索引和新位置
-        :param to_state: 到达的新状态
-        :param line_idx: 动作对应的线路索引
-        :param current_direction: 当前移动方向
-        :return: 新的路径成本
-        """
-        base_cost = 1
-        if self.mode == "mode2":
-            # 获取该线路上次移动方向
-            last_dir = parent_node.directions.get(line_idx)
-            
-            # 只有当该线路有历史方向时才比较
-            if last_dir is not None and current_direction != last_dir:
-                base_cost += 2  # 转向惩罚
-        return parent_node.depth + base_cost
-    
-    def is_valid(self, loc):
-        """
-        判断给定位置是否在网格内。
-        :param loc: 位置，格式为 [行, 列]
-        :return: 如果位置在网格内返回 True，否则返回 False
-        """
-        return 0 <= loc[0] < self.n and 0 <= loc[1] < self.n
-
-    def find_next_active_line(self, lines, current_line):
-        """
-        找到下一个活动线路（未完成的线路）。
-        先从当前线路的下一个开始查找，若未找到则从头开始查找。
-        :param lines: 线路列表，每个元素为 [起点, 终点]
-        :param current_line: 当前线路的索引
-        :return: 下一个活动线路的索引，如果所有线路都已完成则返回 None
-        """
-        n = len(lines)
-        # 从current_line+1开始循环查找
-        for i in range(current_line + 1, n):
-            if lines[i][0] != lines[i][1]:
-                return i
-        # 如果后面没有，从头开始找
-        for i in range(0, current_line + 1):
-            if lines[i][0] != lines[i][1]:
-                return i
-        return None  # 所有线路已完成
-
-    def actions(self, state):
-        """
-        获取当前状态下的所有可用动作。
-        对于当前活动线路，找到其周围的有效移动位置，并生成对应的动作。
-        :param state: 当前状态，包含网格、线路列表和活动线路索引
-        :return: 可用动作列表，每个动作格式为 [线路索引, 新位置]
-        """
-        candidates = []
-        grid = state[0]
-        lines = state[1]
-        active_line = state[2]
-        if active_line is None:
-            return []
-        
-        start = lines[active_line][0]
-        end = lines[active_line][1]
-        if start == end:
-            return []
+        清空画布，按当前视口创建画布元素并绘制给定状态。
+        只为可见范围内的格子各创建一个矩形；每条线路一个起点圆、一个终点方块和一条路径线。
+        每格小于 DETAIL_ZOOM 像素时省略起点圆、终点方块和格子边框，只保留颜色和路径线。
+        元素编号保存在 self.scene 中，供 draw_state 增量更新。
+        :param state: 当前状态
+        """
+        self.canvas.delete("all")
+        n = state.n
+        m = len(state.heads)
+        if len(self.colors) < m:
+            self.colors = generate_palette(m)
+        zoom = self.zoom
+        ox, oy = self.origin
+        detail = zoom >= self.DETAIL_ZOOM
+        view = self.visible_range(n)
+        row_start, row_end, col_start, col_end = view
         
-        candidates_near = [
-            [start[0]-1, start[1]],
-            [start[0]+1, start[1]],
-            [start[0], start[1]-1],
-            [start[0], start[1]+1]
-        ]
-        valid_moves = []
-        for loc in candidates_near:
-            if self.is_valid(loc) and (grid[loc[0]][loc[1]] == 0 or loc == end):
-                valid_moves.append(loc)
-        return [[active_line, loc] for loc in valid_moves]
-
-    def move(self, state, action):
-        """
-        根据给定动作移动到下一个状态。
-        更新网格中线路的位置，修改线路列表，更新活动线路索引。
-        :param state: 当前状态，包含网格、线路列表和活动线路索引
-        :param action: 动作，格式为 [线路索引, 新位置]
-        :return: 下一个状态，包含更新后的网格、线路列表和活动线路索引
-        """
-        new_state = deepcopy(state)
-        grid = new_state[0]
-        lines = new_state[1]
-        active_line = new_state[2]
+        # 绘制可见的格子
+        cells = {}
+        for i in range(row_start, row_end):
+            for j in range(col_start, col_end):
+                x, y = ox + j * zoom, oy + i * zoom
+                value = state.value(i, j)
+                color = self.colors[value-1] if value > 0 else '#ffffff'
+                cells[i * n + j] = self.canvas.create_rectangle(
+                    x, y, x + zoom, y + zoom,
+                    fill=color, outline='#ecf0f1' if detail else '', width=2
+                )
         
-        line_idx, new_loc = action
-        grid[new_loc[0]][new_loc[1]] = line_idx + 1
-        lines[line_idx][0] = new_loc
+        # 绘制连接线和端点
+        radius = min(10, zoom * 0.35)
+        starts, paths = [], []
+        for idx, (head, end) in enumerate(zip(state.heads, state.ends)):
+            color = self.colors[idx]
+            sx, sy, ex, ey = self.line_coords(head, end, n)
+            
+            if detail:
+                # 起点
+                starts.append(self.canvas.create_oval(
+                    sx-radius, sy-radius, sx+radius, sy+radius,
+                    fill=color, outline='#2c3e50', width=2
+                ))
+                
+                # 终点
+                self.canvas.create_rectangle(
+                    ex-radius, ey-radius, ex+radius, ey+radius,
+                    outline=color, width=2, fill='white'
+                )
+            
+            # 路径线，线路完成后隐藏
+            paths.append(self.canvas.create_line(
+                sx, sy, ex, ey,
+                fill=color, width=3 if detail else 2, capstyle=tk.ROUND,
+                dash=(6,4) if idx % 2 == 0 else (4,2),
+                state=tk.HIDDEN if head == end else tk.NORMAL
+            ))
         
-        # 更新active_line
-        new_active_line = self.find_next_active_line(lines, line_idx)
-        new_state[2] = new_active_line
-        return new_state
+        self.scene = {
+            "n": n,
+            "zoom": zoom,
+            "range": view,
+            "radius": radius,
+            "ends": state.ends,
+            "state": state,
+            "cells": cells,
+            "starts": starts,
+            "paths": paths,
+        }
 
-    def is_goal(self, state):
-        """
-        判断当前状态是否为目标状态。
-        目标状态为没有活动线路且所有线路的起点和终点相同。
-        :param state: 当前状态，包含网格、线路列表和活动线路索引
-        :return: 如果是目标状态返回 True，否则返回 False
-        """
-        if state[2] is not None:
-            return False
-        for start, end in state[1]:
-            if start != end:
-                return False
-        return True
-
-def search_generator(problem):
-    """
-    搜索生成器函数，使用优先队列进行搜索。
-    从初始状态开始，不断扩展节点，直到找到目标状态或队列为空。
-    :param problem: 问题对象
-    :yield: 生成搜索过程中的节点
-    """
-    openPQ = PriorityQueue(problem.init_state)
-    closed = Set()
-
-    while not openPQ.empty():
-        current = openPQ.pop()
-        yield current
-
-        if problem.is_goal(current.state):
-            yield current
-            break
+    def draw_initial_state(self):
+        """
+        绘制初始状态。
+        尝试获取初始状态并绘制，如果输入无效则忽略。
+        """
+        try:
+            init_state = self.get_initial_state()
+            self.draw_state(init_state)
+        except ValueError:
+            pass
 
-        closed.add(str(current.state))
-        for child in problem.expand(current):
-            idx = openPQ.find(child)
-            if not (closed.include(str(child.state)) or idx != -1):
-                openPQ.push(child)
-            elif idx != -1 and child.path_cost < openPQ.elements[idx].path_cost:
-                openPQ.compare_and_replace(idx, child)
-    yield None
+    def on_close(self):
+        """
+        处理窗口关闭事件。
+        停止搜索线程和子进程，关闭轨迹文件，销毁窗口。
+        """
+        self.running = False
+        if self.search_thread and self.search_thread.is_alive():
+            self.search_thread.join()
+        self.stop_worker()
+        self.close_replay()
+        self.destroy()
 
 if __name__ == "__main__":
     app = ModernVisualizer()
@@ -0,0 +1,208 @@
+import numpy as np
+
+from CrossLineSolver import (
+    PriorityQueue, h_function_null, h_function_method1, h_function_method2, l_path_lookup,
+)
+
+def mask_to_array(mask, size):
+    """
+    将整数位掩码转换为 0/1 数组。
+    :param mask: 位掩码
+    :param size: 数组长度（格子数）
+    :return: 长度为 size 的 uint8 数组
+    """
+    raw = np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:size]
+
+def l_path_rows(n, starts, end):
+    """
+    生成给定起点到终点 end 的两条 L 形路径的格子计数行。
+    计数与 l_path_entry 的掩码一致：拐角格子计两次，终点不计。
+    只为批中实际出现的起点构造行，不缓存 (n*n, n*n) 的整张表，内存与网格大小的平方成正比。
+    :param n: 网格大小
+    :param starts: 起点列表（编码后的格子）
+    :param end: 终点（编码后的格子）
+    :return: (横向优先计数数组, 纵向优先计数数组)，形状均为 (len(starts), n*n)，第 i 行对应 starts[i]
+    """
+    size = n * n
+    counts_h = np.zeros((len(starts), size), dtype=np.uint8)
+    counts_v = np.zeros((len(starts), size), dtype=np.uint8)
+    for row, start in enumerate(starts):
+        if start == end:
+            continue
+        mask_h, repeated_h, mask_v, repeated_v, _, _ = l_path_lookup(n, start, end)
+        counts_h[row] = mask_to_array(mask_h, size) + mask_to_array(repeated_h, size)
+        counts_v[row] = mask_to_array(mask_v, size) + mask_to_array(repeated_v, size)
+    return counts_h, counts_v
+
+def stack_states(states):
+    """
+    将一批状态堆叠为 NumPy 数组。
+    :param states: 同一问题的状态列表
+    :return: (占用数组 (B, n*n), 起点数组 (B, m), 终点数组 (m,))
+    """
+    occupancy = np.frombuffer(b"".join(state.grid for state in states), dtype=np.uint8)
+    occupancy = occupancy.reshape(len(states), -1)
+    heads = np.array([state.heads for state in states], dtype=np.intp)
+    ends = np.array(states[0].ends, dtype=np.intp)
+    return occupancy, heads, ends
+
+def manhattan_matrix(heads, ends, n):
+    """
+    计算每个状态中每条线路起点到终点的曼哈顿距离。
+    :param heads: 起点数组 (B, m)
+    :param ends: 终点数组 (m,)
+    :param n: 网格大小
+    :return: 距离数组 (B, m)
+    """
+    rows, cols = np.divmod(heads, n)
+    end_rows, end_cols = np.divmod(ends, n)
+    return np.abs(rows - end_rows) + np.abs(cols - end_cols)
+
+def batch_h_null(states):
+    """
+    批量计算空启发函数。
+    :param states: 状态列表
+    :return: 全 0 数组
+    """
+    return np.zeros(len(states), dtype=np.int64)
+
+def batch_h_method1(states):
+    """
+    批量计算 h_function_method1（曼哈顿距离之和）。
+    :param states: 同一问题的状态列表
+    :return: 启发函数值数组
+    """
+    _, heads, ends = stack_states(states)
+    return manhattan_matrix(heads, ends, states[0].n).sum(axis=1)
+
+def batch_h_method2(states):
+    """
+    批量计算 h_function_method2（曼哈顿距离 + 障碍物惩罚），结果与逐个计算完全相同。
+    对每条线路，只为批中不同的起点生成 L 形路径计数行，再按起点展开为 (B, n*n) 的路径数组，
+    与其他线路的占用数组逐元素相乘后求和即为障碍物数量。
+    :param states: 同一问题的状态列表
+    :return: 启发函数值数组
+    """
+    n = states[0].n
+    occupancy, heads, ends = stack_states(states)
+    distances = manhattan_matrix(heads, ends, n)
+    occupied = occupancy != 0
+    total = np.zeros(len(states), dtype=np.int64)
+    for line_idx, end in enumerate(ends.tolist()):
+        line_heads = heads[:, line_idx]
+        starts, rows = np.unique(line_heads, return_inverse=True)
+        counts_h, counts_v = l_path_rows(n, starts.tolist(), end)
+        others = occupied & (occupancy != line_idx + 1)
+        obstacles_h = (counts_h[rows] * others).sum(axis=1, dtype=np.int64)
+        obstacles_v = (counts_v[rows] * others).sum(axis=1, dtype=np.int64)
+        cost = distances[:, line_idx] + 2 * np.minimum(obstacles_h, obstacles_v)
+        total += np.where(line_heads == end, 0, cost)
+    return total
+
+# 启发函数到其批量版本的映射
+# 增量启发函数不在其中：它们仍由 child_node 逐个计算，以便把 h_parts 传给子节点
+BATCH_HEURISTICS = {
+    h_function_null: batch_h_null,
+    h_function_method1: batch_h_method1,
+    h_function_method2: batch_h_method2,
+}
+
+def expand_batch(problem, nodes):
+    """
+    批量扩展多个节点。
+    先生成所有子状态，再用 NumPy 一次性计算它们的启发函数值；
+    问题的启发函数没有批量版本时退回逐个计算。
+    问题启用剪枝时与 MatchProblem.expand 相同，在计算启发函数之前剪除死路。
+    :param problem: 问题对象
+    :param nodes: 待扩展的节点列表
+    :return: 与 nodes 对应的子节点列表的列表
+    """
+    prune = getattr(problem, "prune", False)
+    pairs = []
+    states = []
+    for node in nodes:
+        if prune and node.parent is None and problem.is_dead(node.state):
+            continue
+        for action in problem.actions(node.state):
+            next_state = problem.move(node.state, action)
+            if prune and problem.is_dead_after(node.state, action, next_state):
+                problem.pruned += 1
+                continue
+            pairs.append((node, action))
+            states.append(next_state)
+    if not pairs:
+        return [[] for _ in nodes]
+
+    evaluate = BATCH_HEURISTICS.get(problem.h)
+    if evaluate is None:
+        h_values = [None] * len(states)
+    else:
+        h_values = evaluate(states).tolist()
+
+    children = {id(node): [] for node in nodes}
+    for (node, action), state, h in zip(pairs, states, h_values):
+        children[id(node)].append(node.child_node(problem, action, state, h))
+    return [children[id(node)] for node in nodes]
+
+def batch_search_generator(problem, batch_size=32, stats=None):
+    """
+    批量扩展的最佳优先搜索生成器。
+    每轮从开放表取出最多 batch_size 个节点，用 expand_batch 一起扩展。
+    由于同一批节点在彼此的子节点生成之前就被扩展，关闭集合记录每个状态的最小 g 值，
+    发现更短路径时重新打开该状态；目标节点只有位于批首（即开放表中 f 值最小）时才返回，
+    否则放回开放表，从而在启发函数可采纳时保持最优性。
+    :param problem: 问题对象
+    :param batch_size: 每轮扩展的节点数
+    :param stats: 可选的 SearchStats 对象，记录扩展、生成、重新打开次数和开放表、关闭集合的峰值
+    :yield: 生成搜索过程中的节点，找到目标时连续生成两次目标节点，最后生成 None
+    """
+    infinity = float("inf")
+    openPQ = PriorityQueue(problem.init_state, key=problem.node_key)
+    closed = {}  # 去重键 -> 已扩展时的 g 值
+
+    while not openPQ.empty():
+        batch = []
+        while len(batch) < batch_size and not openPQ.empty():
+            batch.append(openPQ.pop())
+
+        # 批中第一个目标节点及其后的节点放回开放表
+        for i, node in enumerate(batch):
+            if problem.is_goal(node.state):
+                if i == 0:
+                    yield node
+                    yield node
+                    yield None
+                    return
+                for rest in batch[i:]:
+                    openPQ.push(rest)
+                batch = batch[:i]
+                break
+
+        for node in batch:
+            closed[problem.node_key(node)] = node.depth
+            if stats is not None:
+                stats.expanded += 1
+                if stats.callback is not None and stats.expanded % stats.interval == 0:
+                    stats.callback(stats)
+            yield node
+
+        for children in expand_batch(problem, batch):
+            if stats is not None:
+                stats.generated += len(children)
+            for child in children:
+                if child.path_cost == infinity:
+                    continue  # 某条线路已无法到达终点
+                key = problem.node_key(child)
+                closed_g = closed.get(key)
+                if closed_g is not None:
+                    if child.depth >= closed_g:
+                        continue
+                    del closed[key]  # 找到更短路径，重新打开
+                    if stats is not None:
+                        stats.reopened += 1
+                openPQ.push(child, key)
+        if stats is not None:
+            stats.open_peak = max(stats.open_peak, len(openPQ))
+            stats.closed_peak = max(stats.closed_peak, len(closed))
+    yield None
@@ -0,0 +1,253 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows 上没有 resource 模块，此时不记录内存峰值
+    resource = None
+
+from CrossLineCLI import build_problem
+from CrossLineSolver import HEURISTICS, SearchStats, search_generator
+
+# 已知的困难实例（坐标从 1 开始），可采纳启发函数的 A* 在两种模式下都需要扩展上万个节点，单次运行 1 秒以上
+HARD_INSTANCES = [
+    {"id": "hard-7x7-6a", "n": 7,
+     "pairs": [[[6, 2], [7, 3]], [[1, 3], [5, 5]], [[5, 3], [3, 7]], [[4, 7], [7, 4]],
+               [[1, 7], [1, 6]], [[1, 2], [3, 1]]]},
+    {"id": "hard-7x7-6b", "n": 7,
+     "pairs": [[[5, 7], [3, 3]], [[4, 7], [2, 5]], [[7, 4], [4, 1]], [[2, 3], [1, 7]],
+               [[7, 5], [6, 7]], [[2, 1], [4, 2]]]},
+    {"id": "hard-8x8-7", "n": 8,
+     "pairs": [[[7, 2], [8, 7]], [[2, 8], [3, 5]], [[4, 8], [3, 8]], [[6, 1], [3, 4]],
+               [[1, 4], [3, 2]], [[6, 7], [8, 8]], [[6, 2], [5, 5]]]},
+]
+
+def random_instance(rng, n, m):
+    """
+    随机生成一个实例，2m 个端点互不重合。
+    :param rng: random.Random 对象
+    :param n: 网格大小
+    :param m: 线路数量
+    :return: 实例字典（坐标从 1 开始）
+    """
+    cells = rng.sample(range(n * n), 2 * m)
+    pairs = []
+    for i in range(m):
+        start, end = cells[2 * i], cells[2 * i + 1]
+        pairs.append([[start // n + 1, start % n + 1], [end // n + 1, end % n + 1]])
+    return {"n": n, "pairs": pairs}
+
+def is_solvable(instance, max_expansions):
+    """
+    判断实例是否有解。
+    使用 mode1 和曼哈顿距离启发函数搜索，超过扩展上限时视为未知。
+    :param instance: 实例字典
+    :param max_expansions: 扩展节点数上限
+    :return: 有解返回 True，无解返回 False，超过上限返回 None
+    """
+    problem = build_problem(dict(instance, mode="mode1"), "method1")
+    expansions = 0
+    for node in search_generator(problem):
+        if node is None:
+            return False
+        if problem.is_goal(node.state):
+            return True
+        expansions += 1
+        if expansions >= max_expansions:
+            return None
+    return False
+
+def generate_instances(seed, sizes, pair_counts, count, max_expansions=20000):
+    """
+    按种子生成可复现的有解随机实例。
+    每个 (n, m) 组合生成 count 个实例，无解或无法在扩展上限内确认有解的实例被丢弃。
+    :param seed: 随机种子
+    :param sizes: 网格大小列表
+    :param pair_counts: 线路数量列表
+    :param count: 每个组合的实例数
+    :param max_expansions: 可解性检查的扩展节点数上限
+    :return: 实例字典列表
+    """
+    rng = random.Random(seed)
+    instances = []
+    for n in sizes:
+        for m in pair_counts:
+            if 2 * m > n * n:
+                continue
+            found = 0
+            attempts = 0
+            while found < count and attempts < 50 * count:
+                attempts += 1
+                instance = random_instance(rng, n, m)
+                if is_solvable(instance, max_expansions):
+                    instance["id"] = f"rand-{n}x{n}-{m}-{found}"
+                    instances.append(instance)
+                    found += 1
+    return instances
+
+def run_search(problem, max_expansions, stats=None):
+    """
+    运行一次搜索，直到找到目标、搜索空间穷尽或达到扩展上限。
+    :param problem: 问题对象
+    :param max_expansions: 扩展节点数上限，为 0 时不限制
+    :param stats: 可选的 SearchStats 对象，给出时使用带插桩的搜索
+    :return: (目标节点或 None, 是否因达到上限而停止)
+    """
+    expansions = 0
+    for node in search_generator(problem, stats):
+        if node is None:
+            break
+        if problem.is_goal(node.state):
+            return node, False
+        expansions += 1
+        if max_expansions and expansions >= max_expansions:
+            return None, True
+    return None, False
+
+def run_case(case):
+    """
+    运行单个基准测试用例，在独立进程中调用以便测量内存峰值。
+    先用无插桩的搜索计时并测量内存峰值，再单独运行一次带插桩的搜索收集计数和各阶段耗时，
+    因此 wall_time 不包含插桩的开销。
+    :param case: (实例, 模式, 启发函数名称, 搜索引擎名称, 扩展节点数上限)
+    :return: 结果字典
+    """
+    instance, mode, heuristic, engine, max_expansions = case
+    problem = build_problem(dict(instance, mode=mode), heuristic, engine)
+    start_time = time.perf_counter()
+    goal, truncated = run_search(problem, max_expansions)
+    wall_time = time.perf_counter() - start_time
+    peak_rss_kb = None
+    if resource is not None:
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    stats = SearchStats()
+    run_search(build_problem(dict(instance, mode=mode), heuristic, engine), max_expansions, stats)
+
+    result = {
+        "id": instance.get("id"),
+        "n": instance["n"],
+        "m": len(instance["pairs"]),
+        "mode": mode,
+        "heuristic": heuristic,
+        "engine": engine,
+        "solved": goal is not None,
+        "truncated": truncated,
+        "cost": goal.depth if goal is not None else None,
+        "wall_time": wall_time,
+        "peak_rss_kb": peak_rss_kb,
+    }
+    result.update(stats.as_dict())
+    return result
+
+def git_revision():
+    """
+    获取当前代码的 git 提交哈希。
+    :return: 提交哈希，无法获取时返回 None
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline):
+    """
+    与之前保存的基准结果比较，打印成本改变、扩展节点数或运行时间变差的用例。
+    :param results: 本次结果列表
+    :param baseline: 之前保存的结果列表
+    :return: 退化的用例数
+    """
+    def case_key(r):
+        return (r["id"], r["mode"], r["heuristic"], r["engine"])
+    old = {case_key(r): r for r in baseline}
+    regressions = 0
+    for r in results:
+        prev = old.get(case_key(r))
+        if prev is None:
+            continue
+        regressed = False
+        if r["cost"] != prev["cost"]:
+            print(f"COST   {case_key(r)}: {prev['cost']} -> {r['cost']}")
+            regressed = True
+        if r["expanded"] > prev["expanded"]:
+            print(f"NODES  {case_key(r)}: {prev['expanded']} -> {r['expanded']}")
+            regressed = True
+        if r["wall_time"] > 1.2 * prev["wall_time"] and r["wall_time"] > 0.05:
+            print(f"TIME   {case_key(r)}: {prev['wall_time']:.3f}s -> {r['wall_time']:.3f}s")
+            regressed = True
+        regressions += regressed
+    return regressions
+
+def main(argv=None):
+    """
+    基准测试入口：生成实例，在两种模式下运行所有启发函数，并把结果写入 JSON 文件。
+    :param argv: 命令行参数，默认为 sys.argv[1:]
+    :return: 退出码，与 --baseline 比较发现退化时为 1
+    """
+    parser = argparse.ArgumentParser(description="Benchmark search_generator on seeded instances.")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 5, 6])
+    parser.add_argument("--pairs", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--count", type=int, default=3,
+                        help="instances per (size, pairs) combination")
+    parser.add_argument("--no-hard", action="store_true", help="skip the known-hard instances")
+    parser.add_argument("--heuristics", nargs="+", choices=sorted(HEURISTICS),
+                        default=sorted(HEURISTICS))
+    parser.add_argument("--modes", nargs="+", choices=["mode1", "mode2"],
+                        default=["mode1", "mode2"])
+    parser.add_argument("--engine", choices=["list", "bitboard"], default="list")
+    parser.add_argument("--max-expansions", type=int, default=200000,
+                        help="stop a run after this many expansions (0 = no limit)")
+    parser.add_argument("-j", "--workers", type=int, default=1)
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare against; "
+                        "exit with status 1 if any case regressed")
+    args = parser.parse_args(argv)
+
+    instances = generate_instances(args.seed, args.sizes, args.pairs, args.count)
+    if not args.no_hard:
+        instances += HARD_INSTANCES
+    cases = [(instance, mode, heuristic, args.engine, args.max_expansions)
+             for instance in instances
+             for mode in args.modes
+             for heuristic in args.heuristics]
+
+    # 每个用例使用新的工作进程，使 ru_maxrss 反映单次运行的内存峰值
+    results = []
+    with multiprocessing.Pool(args.workers, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_case, cases):
+            results.append(result)
+            print(f"{result['id']:<16} {result['mode']} {result['heuristic']:<8} "
+                  f"cost={result['cost']} expanded={result['expanded']} "
+                  f"time={result['wall_time']:.3f}s", flush=True)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "instances": instances,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"])
+        if regressions:
+            print(f"{regressions} case(s) regressed", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+from CrossLineSolver import (
+    HEURISTICS, State, MatchProblem, BitboardMatchProblem, SearchStats, search_generator,
+    ida_search_generator, beam_search_generator, anytime_search_generator,
+)
+
+# 搜索引擎名称到问题类的映射
+ENGINES = {
+    "list": MatchProblem,
+    "bitboard": BitboardMatchProblem,
+}
+
+def read_instances(paths):
+    """
+    从 JSON 或 JSONL 文件（或标准输入）读取问题实例。
+    JSON 文件可以包含单个实例或实例列表，JSONL 文件每行一个实例。
+    路径为 "-" 或未给出路径时从标准输入读取。
+    :param paths: 文件路径列表
+    :yield: 实例字典
+    """
+    for path in paths or ["-"]:
+        if path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        stripped = text.strip()
+        if not stripped:
+            continue
+        try:
+            data = json.loads(stripped)
+        except json.JSONDecodeError:
+            data = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+        if isinstance(data, dict):
+            data = [data]
+        for instance in data:
+            yield instance
+
+def build_problem(instance, heuristic="method1", engine="list", prune=False):
+    """
+    由实例字典创建问题对象。
+    实例格式为 {"n": 网格大小, "mode": "mode1" 或 "mode2",
+    "pairs": [[[起点行, 起点列], [终点行, 终点列]], ...]}，坐标与界面一致从 1 开始。
+    :param instance: 实例字典
+    :param heuristic: 启发函数名称，见 HEURISTICS
+    :param engine: 搜索引擎名称，见 ENGINES
+    :param prune: 是否在扩展时剪除死路
+    :return: 问题对象
+    """
+    n = int(instance["n"])
+    mode = instance.get("mode", "mode1")
+    if n < 2:
+        raise ValueError("Grid size must be at least 2")
+    if mode not in ("mode1", "mode2"):
+        raise ValueError(f"Unknown mode {mode!r}")
+    
+    lines = []
+    for i, (start, end) in enumerate(instance["pairs"]):
+        start_row, start_col = int(start[0]) - 1, int(start[1]) - 1
+        end_row, end_col = int(end[0]) - 1, int(end[1]) - 1
+        if not (0 <= start_row < n and 0 <= start_col < n and
+                0 <= end_row < n and 0 <= end_col < n):
+            raise ValueError(f"Invalid coordinates for pair {i+1}")
+        lines.append([[start_row, start_col], [end_row, end_col]])
+    
+    return ENGINES[engine](
+        n,
+        State.initial(n, lines),
+        h_function=HEURISTICS[heuristic],
+        path_cost=0,
+        mode=mode,
+        prune=prune
+    )
+
+def solve_instance(instance, heuristic="method1", engine="list", profile=False, prune=False,
+                   search="astar", table_size=None, release_states=False, weight=3.0,
+                   time_limit=None, beam_width=100, beam_max_width=None, batch_size=32):
+    """
+    不经过界面，运行搜索直到找到解或确认无解。
+    :param instance: 实例字典
+    :param heuristic: 启发函数名称
+    :param engine: 搜索引擎名称
+    :param profile: 是否记录搜索统计信息和各阶段耗时
+    :param prune: 是否在扩展时剪除死路
+    :param search: 搜索算法，"astar"、"ida"（内存受限的迭代加深 A*）、"beam"（束搜索）、
+                   "anytime"（随时加权 A*）或 "batch"（批量扩展的 A*，需要 NumPy）
+    :param table_size: IDA* 置换表容量，为 None 时不使用置换表
+    :param release_states: A* 搜索中是否释放已扩展节点的状态以节省内存
+    :param weight: 随时搜索的初始启发函数权重
+    :param time_limit: 随时搜索的时间限制（秒），为 None 时一直运行到证明最优
+    :param beam_width: 束搜索的束宽
+    :param beam_max_width: 束搜索丢失解后允许加倍到的最大束宽，为 None 时不重新搜索
+    :param batch_size: 批量搜索每轮扩展的节点数
+    :return: 结果字典，包含是否有解、路径成本、路径、扩展节点数和运行时间；
+             随时搜索另外给出次优界限 bound 和依次找到的各个解 solutions，
+             束搜索另外给出丢失解的次数 beam_failures
+    """
+    result = {"id": instance.get("id")}
+    try:
+        problem = build_problem(instance, heuristic, engine, prune)
+    except (IndexError, KeyError, TypeError, ValueError) as e:
+        result["error"] = str(e)
+        return result
+    
+    stats = SearchStats() if profile else None
+    start_time = time.perf_counter()
+    expansions = 0
+    goal = None
+    if search == "anytime":
+        counter = stats if stats is not None else SearchStats()
+        solutions = []
+        for goal, bound in anytime_search_generator(problem, weight, time_limit=time_limit,
+                                                    stats=counter):
+            solutions.append({"cost": goal.depth, "bound": bound,
+                              "time": time.perf_counter() - start_time})
+        expansions = counter.expanded
+        result["bound"] = solutions[-1]["bound"] if solutions else None
+        result["solutions"] = solutions
+    else:
+        if search == "ida":
+            nodes = ida_search_generator(problem, table_size, stats)
+        elif search == "beam":
+            counter = stats if stats is not None else SearchStats()
+            nodes = beam_search_generator(problem, beam_width, beam_max_width, counter)
+        elif search == "batch":
+            # 只在选择批量搜索时导入，其余搜索不依赖 NumPy
+            from CrossLineBatch import batch_search_generator
+            nodes = batch_search_generator(problem, batch_size, stats)
+        else:
+            nodes = search_generator(problem, stats, release_states=release_states)
+        for node in nodes:
+            if node is None:
+                break
+            expansions += 1
+            if problem.is_goal(node.state):
+                goal = node
+                break
+        if search == "beam":
+            result["beam_failures"] = counter.beam_failures
+    
+    result["solved"] = goal is not None
+    result["cost"] = goal.depth if goal is not None else None
+    result["path"] = None
+    if goal is not None:
+        n = problem.n
+        result["path"] = [[line_idx + 1, cell // n + 1, cell % n + 1]
+                          for line_idx, cell in problem.solution(goal)]
+    result["expansions"] = expansions
+    result["wall_time"] = time.perf_counter() - start_time
+    if prune:
+        result["pruned"] = problem.pruned
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+    return result
+
+def solve_task(task):
+    """
+    进程池工作函数，解包参数后调用 solve_instance。
+    :param task: (实例, solve_instance 的关键字参数字典)
+    :return: 结果字典
+    """
+    instance, options = task
+    return solve_instance(instance, **options)
+
+def main(argv=None):
+    """
+    命令行入口：读取实例，求解并以 JSONL 格式逐行输出结果。
+    :param argv: 命令行参数，默认为 sys.argv[1:]
+    :return: 退出码
+    """
+    parser = argparse.ArgumentParser(
+        description="Solve Line Matching instances without the GUI and stream JSONL results.")
+    parser.add_argument("inputs", nargs="*",
+                        help="JSON or JSONL instance files ('-' or none reads stdin)")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default="method1")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="list")
+    parser.add_argument("--profile", action="store_true",
+                        help="add per-phase timings and search counters to each result")
+    parser.add_argument("--prune", action="store_true",
+                        help="drop children in which an unfinished line can no longer reach its end")
+    parser.add_argument("--search", choices=["astar", "ida", "beam", "anytime", "batch"],
+                        default="astar",
+                        help="search algorithm; 'ida' is memory-bounded iterative-deepening A*, "
+                             "'beam' keeps the best --beam-width nodes per step (not optimal), "
+                             "'anytime' streams improving solutions from weighted A*, "
+                             "'batch' expands --batch-size nodes per round with NumPy heuristics")
+    parser.add_argument("--table-size", type=int, default=None,
+                        help="transposition table capacity for --search ida (default: none)")
+    parser.add_argument("--release-states", action="store_true",
+                        help="drop the state of expanded nodes and rebuild it on demand (A* only)")
+    parser.add_argument("--beam-width", type=int, default=100,
+                        help="nodes kept per step for --search beam")
+    parser.add_argument("--beam-max-width", type=int, default=None,
+                        help="retry with doubled width up to this value when the beam loses the solution")
+    parser.add_argument("--batch-size", type=int, default=32,
+                        help="nodes expanded per round for --search batch")
+    parser.add_argument("--weight", type=float, default=3.0,
+                        help="initial heuristic weight for --search anytime")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="time budget in seconds for --search anytime (best-so-far is returned)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output JSONL file (default: stdout)")
+    args = parser.parse_args(argv)
+    
+    options = {
+        "heuristic": args.heuristic,
+        "engine": args.engine,
+        "profile": args.profile,
+        "prune": args.prune,
+        "search": args.search,
+        "table_size": args.table_size,
+        "release_states": args.release_states,
+        "weight": args.weight,
+        "time_limit": args.time_limit,
+        "beam_width": args.beam_width,
+        "beam_max_width": args.beam_max_width,
+        "batch_size": args.batch_size,
+    }
+    tasks = ((instance, options) for instance in read_instances(args.inputs))
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.workers > 1:
+            with multiprocessing.Pool(args.workers) as pool:
+                for result in pool.imap(solve_task, tasks):
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+        else:
+            for task in tasks:
+                out.write(json.dumps(solve_task(task)) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import argparse
+import json
+import math
+import multiprocessing
+import queue
+import sys
+import time
+
+from CrossLineCLI import ENGINES, build_problem, read_instances
+from CrossLineSolver import HEURISTICS, Node, PriorityQueue
+
+def direction_deltas(n):
+    """
+    获取方向编码对应的格子偏移量。
+    路径中每一步编码为一个字节：0 上、1 下、2 左、3 右。
+    :param n: 网格大小
+    :return: 元组，第 code 个元素为该方向的偏移量
+    """
+    return (-n, n, -1, 1)
+
+def decode_path(problem, path):
+    """
+    从初始状态回放编码后的路径，还原动作列表。
+    每一步移动的线路由当前状态的活动线路决定，因此路径中只需记录方向。
+    :param problem: 问题对象
+    :param path: 方向编码组成的 bytes
+    :return: 动作列表，每个动作为 (线路索引, 新位置)
+    """
+    deltas = direction_deltas(problem.n)
+    state = problem.init_state.state
+    actions = []
+    for code in path:
+        line_idx = state.active_line
+        action = (line_idx, state.heads[line_idx] + deltas[code])
+        actions.append(action)
+        state = problem.move(state, action)
+    return actions
+
+def hda_worker(rank, instance, heuristic, engine, prune, inboxes, results,
+               best, sent, received, idle, stop, batch_size):
+    """
+    HDA* 工作进程。
+    每个状态由其 Zobrist 键对进程数取模所得的进程负责，该进程独占其开放表和关闭集合，
+    两者按 problem.node_key 去重（mode2 中同一状态的不同方向组合归同一进程）；
+    生成的子节点按所属进程缓冲，攒够一批或本地无事可做时发送，
+    每个节点以 (状态, f, g, 压缩的方向, 路径编码) 的形式传递；增量启发函数的中间结果
+    （distance_incremental 中为每条线路一张距离图）不随节点发送，而由负责的进程在扩展该节点前
+    重新计算一次，其子节点仍可增量计算。
+    所有进程共享当前最优解的成本，f 值不小于该成本的节点直接丢弃。
+    :param rank: 本进程编号
+    :param instance: 实例字典
+    :param heuristic: 启发函数名称
+    :param engine: 搜索引擎名称
+    :param prune: 是否剪除死路
+    :param inboxes: 各进程的收件队列
+    :param results: 结果队列，发送 ("solution", 成本, 路径) 和 ("done", 编号, 扩展节点数)
+    :param best: 共享的最优解成本（multiprocessing.Value）
+    :param sent: 各进程已发送的批次数（multiprocessing.Array）
+    :param received: 各进程已接收的批次数（multiprocessing.Array）
+    :param idle: 各进程是否空闲（multiprocessing.Array）
+    :param stop: 终止事件
+    :param batch_size: 每批发送的节点数
+    """
+    problem = build_problem(instance, heuristic, engine, prune)
+    workers = len(inboxes)
+    inbox = inboxes[rank]
+    codes = {delta: code for code, delta in enumerate(direction_deltas(problem.n))}
+    node_key = problem.node_key
+    openPQ = PriorityQueue(key=node_key)
+    closed = {}  # 去重键 -> 扩展时的 g 值
+    trails = {}  # 去重键 -> 从初始状态到该节点的路径编码
+    outboxes = [[] for _ in range(workers)]
+    expansions = 0
+
+    def admit(item, h_parts=None):
+        # 接收一个节点：已以更小或相同的 g 值扩展过、或开放表中已有更优副本时丢弃
+        state, f, g, dirs, path = item
+        node = Node(state, path_cost=f, directions=dirs, h_parts=h_parts)
+        node.depth = g
+        key = node_key(node)
+        closed_g = closed.get(key)
+        if closed_g is not None:
+            if g >= closed_g:
+                return
+            del closed[key]  # 找到更短路径，重新打开
+        idx = openPQ.find(node, key)
+        if idx != -1:
+            if f >= openPQ.elements[idx].path_cost:
+                return
+            openPQ.compare_and_replace(idx, node)
+        else:
+            openPQ.push(node, key)
+        trails[key] = path
+
+    def send(target):
+        # 发送缓冲的批次，先计数再放入队列，保证传递中的批次总能被终止检测看到
+        sent[rank] += 1
+        inboxes[target].put(outboxes[target])
+        outboxes[target] = []
+
+    def drain(timeout=None):
+        # 处理收件队列中的所有批次，timeout 不为 None 时先阻塞等待第一批
+        while True:
+            try:
+                if timeout is not None:
+                    batch = inbox.get(timeout=timeout)
+                    timeout = None
+                else:
+                    batch = inbox.get_nowait()
+            except queue.Empty:
+                return
+            idle[rank] = 0
+            received[rank] += 1
+            for item in batch:
+                admit(item)
+
+    while not stop.is_set():
+        drain()
+        incumbent = best.value
+        for _ in range(batch_size):
+            if openPQ.empty():
+                break
+            node = openPQ.pop()
+            if node.path_cost >= incumbent:
+                # 剩余节点的 f 值都不会更小，连同它们的路径编码一起丢弃
+                openPQ = PriorityQueue(key=node_key)
+                trails.clear()
+                break
+            key = node_key(node)
+            closed[key] = node.depth
+            path = trails.pop(key)
+            expansions += 1
+            if problem.incremental_h and node.h_parts is None:
+                _, node.h_parts = problem.h(node.state)  # 由其他进程转发来的节点
+            for child in problem.expand(node):
+                if child.path_cost >= incumbent:
+                    continue
+                line_idx, cell = child.action
+                child_path = path + bytes((codes[cell - node.state.heads[line_idx]],))
+                if problem.is_goal(child.state):
+                    with best.get_lock():
+                        if child.depth < best.value:
+                            best.value = child.depth
+                            results.put(("solution", child.depth, child_path))
+                    incumbent = best.value
+                    continue
+                item = (child.state, child.path_cost, child.depth, child.dirs, child_path)
+                target = child.state.key % workers
+                if target == rank:
+                    admit(item, child.h_parts)
+                else:
+                    outboxes[target].append(item)
+                    if len(outboxes[target]) >= batch_size:
+                        send(target)
+        if openPQ.empty():
+            for target in range(workers):
+                if outboxes[target]:
+                    send(target)
+            idle[rank] = 1
+            drain(timeout=0.01)
+    results.put(("done", rank, expansions))
+
+def hda_star(instance, heuristic="distance_incremental", engine="list", prune=False,
+             workers=None, batch_size=64):
+    """
+    哈希分布式并行 A*（HDA*）。
+    启动 workers 个工作进程，按状态键分配状态，主进程负责检测终止并收集结果。
+    终止条件：所有进程空闲，且两次连续读取的发送、接收批次总数相同并彼此相等，
+    即没有仍在传递中的节点。启发函数可采纳时，此时的最优解成本即为最优。
+    :param instance: 实例字典，格式见 CrossLineCLI.build_problem
+    :param heuristic: 启发函数名称
+    :param engine: 搜索引擎名称
+    :param prune: 是否剪除死路
+    :param workers: 工作进程数，默认为 CPU 核数
+    :param batch_size: 每批发送和每轮扩展的节点数
+    :return: 结果字典，包含是否有解、成本、动作列表、扩展节点数和运行时间
+    """
+    workers = workers or multiprocessing.cpu_count()
+    problem = build_problem(instance, heuristic, engine, prune)
+    start_time = time.perf_counter()
+    if problem.is_goal(problem.init_state.state):
+        return {"solved": True, "cost": problem.init_state.depth, "actions": [],
+                "expansions": 0, "worker_expansions": [0] * workers,
+                "wall_time": time.perf_counter() - start_time}
+
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    best = multiprocessing.Value("d", math.inf)
+    # 最后一个计数位属于主进程，用于发送初始节点
+    sent = multiprocessing.Array("q", workers + 1, lock=False)
+    received = multiprocessing.Array("q", workers + 1, lock=False)
+    idle = multiprocessing.Array("b", workers, lock=False)
+    stop = multiprocessing.Event()
+
+    root = problem.init_state
+    sent[workers] += 1
+    inboxes[root.state.key % workers].put(
+        [(root.state, root.path_cost, root.depth, root.dirs, b"")])
+
+    processes = [multiprocessing.Process(
+        target=hda_worker,
+        args=(rank, instance, heuristic, engine, prune, inboxes, results,
+              best, sent, received, idle, stop, batch_size))
+        for rank in range(workers)]
+    for process in processes:
+        process.start()
+
+    solution = None
+    worker_expansions = [0] * workers
+    try:
+        previous = None
+        while True:
+            time.sleep(0.005)
+            if not all(process.is_alive() for process in processes):
+                raise RuntimeError("HDA* worker exited unexpectedly")
+            snapshot = (all(idle), sum(sent), sum(received))
+            if snapshot[0] and snapshot[1] == snapshot[2] and snapshot == previous:
+                break
+            previous = snapshot
+        stop.set()
+
+        # 每个进程的结果按发送顺序到达，收到全部 "done" 时所有解都已收到
+        done = 0
+        while done < workers:
+            message = results.get()
+            if message[0] == "solution":
+                if solution is None or message[1] < solution[1]:
+                    solution = message
+            else:
+                worker_expansions[message[1]] = message[2]
+                done += 1
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    wall_time = time.perf_counter() - start_time
+    return {
+        "solved": solution is not None,
+        "cost": solution[1] if solution is not None else None,
+        "actions": decode_path(problem, solution[2]) if solution is not None else None,
+        "expansions": sum(worker_expansions),
+        "worker_expansions": worker_expansions,
+        "wall_time": wall_time,
+    }
+
+def main(argv=None):
+    """
+    命令行入口：用 HDA* 逐个求解实例，并以 JSONL 格式逐行输出结果。
+    :param argv: 命令行参数，默认为 sys.argv[1:]
+    :return: 退出码
+    """
+    parser = argparse.ArgumentParser(
+        description="Solve instances with hash-distributed parallel A* (HDA*).")
+    parser.add_argument("inputs", nargs="*",
+                        help="JSON or JSONL instance files ('-' or none reads stdin)")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default="distance_incremental")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="list")
+    parser.add_argument("--prune", action="store_true",
+                        help="drop children in which an unfinished line can no longer reach its end")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("-o", "--output", default="-",
+                        help="output JSONL file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for instance in read_instances(args.inputs):
+            result = {"id": instance.get("id")}
+            try:
+                outcome = hda_star(instance, args.heuristic, args.engine, args.prune,
+                                   args.workers, args.batch_size)
+            except (IndexError, KeyError, TypeError, ValueError) as e:
+                result["error"] = str(e)
+            else:
+                n = int(instance["n"])
+                result["solved"] = outcome["solved"]
+                result["cost"] = outcome["cost"]
+                result["path"] = None
+                if outcome["actions"] is not None:
+                    result["path"] = [[line_idx + 1, cell // n + 1, cell % n + 1]
+                                      for line_idx, cell in outcome["actions"]]
+                result["expansions"] = outcome["expansions"]
+                result["worker_expansions"] = outcome["worker_expansions"]
+                result["wall_time"] = outcome["wall_time"]
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
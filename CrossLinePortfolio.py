@@ -0,0 +1,255 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from CrossLineCLI import build_problem, read_instances
+from CrossLineSolver import ADMISSIBLE_HEURISTICS, search_generator
+
+def prefer_deep(node):
+    """
+    平局裁决：路径成本相同时优先扩展 g 值较大（更接近目标）的节点。
+    :param node: 节点
+    :return: 裁决值，越小越优先
+    """
+    return -node.depth
+
+def prefer_shallow(node):
+    """
+    平局裁决：路径成本相同时优先扩展 g 值较小的节点。
+    :param node: 节点
+    :return: 裁决值，越小越优先
+    """
+    return node.depth
+
+# 平局裁决名称到函数的映射，"fifo" 表示按插入顺序
+TIE_BREAKS = {
+    "fifo": None,
+    "deep": prefer_deep,
+    "shallow": prefer_shallow,
+}
+
+# 默认组合：只使用可采纳的启发函数，第一个得到的解即可证明最优
+PORTFOLIO = [
+    {"heuristic": "distance_incremental", "tie_break": "deep", "order": "given", "prune": True},
+    {"heuristic": "distance_incremental", "tie_break": "deep", "order": "longest", "prune": True},
+    {"heuristic": "distance_incremental", "tie_break": "fifo", "order": "shortest", "prune": True},
+    {"heuristic": "distance_incremental", "tie_break": "deep", "order": "reversed", "prune": True},
+    {"heuristic": "method1", "tie_break": "deep", "order": "given", "prune": True},
+    {"heuristic": "method1", "tie_break": "fifo", "order": "given", "prune": False},
+]
+
+def line_order(pairs, order):
+    """
+    计算线路的处理顺序。
+    :param pairs: 线路列表，每个元素为 [起点, 终点]
+    :param order: "given"、"reversed"、"longest"（曼哈顿距离从长到短）或 "shortest"
+    :return: 原线路索引组成的列表，第 k 个元素为新问题中第 k 条线路对应的原索引
+    """
+    indices = list(range(len(pairs)))
+    def length(i):
+        (sr, sc), (er, ec) = pairs[i]
+        return abs(sr - er) + abs(sc - ec)
+    if order == "given":
+        return indices
+    if order == "reversed":
+        return indices[::-1]
+    if order == "longest":
+        return sorted(indices, key=lambda i: -length(i))
+    if order == "shortest":
+        return sorted(indices, key=length)
+    raise ValueError(f"Unknown line order {order!r}")
+
+def interleave_actions(actions, line_count):
+    """
+    把解的动作重新排列为原问题的轮转顺序。
+    各线路的路径互不相交，任意交错顺序都合法且成本相同，
+    因此只需保持每条线路内部的顺序，再按原问题查找活动线路的规则依次取出。
+    :param actions: 动作列表，每个动作为 (原线路索引, 新位置)
+    :param line_count: 线路数量
+    :return: 重新排列后的动作列表
+    """
+    queues = [[] for _ in range(line_count)]
+    for action in actions:
+        queues[action[0]].append(action)
+    positions = [0] * line_count
+    remaining = len(actions)
+    result = []
+    line_idx = -1
+    while remaining:
+        # 与 MatchProblem.find_next_active_line 相同：从下一条线路开始循环查找
+        for step in range(1, line_count + 1):
+            candidate = (line_idx + step) % line_count
+            if positions[candidate] < len(queues[candidate]):
+                line_idx = candidate
+                break
+        result.append(queues[line_idx][positions[line_idx]])
+        positions[line_idx] += 1
+        remaining -= 1
+    return result
+
+def run_config(task):
+    """
+    在工作进程中用一种配置求解实例。
+    :param task: (实例字典, 配置字典, 搜索引擎名称)
+    :return: 结果字典，actions 为原线路编号下按轮转顺序排列的动作列表
+    """
+    instance, config, engine = task
+    order = line_order(instance["pairs"], config.get("order", "given"))
+    reordered = dict(instance, pairs=[instance["pairs"][i] for i in order])
+    problem = build_problem(reordered, config["heuristic"], engine, config.get("prune", False))
+
+    start_time = time.perf_counter()
+    expansions = 0
+    goal = None
+    for node in search_generator(problem, tie_break=TIE_BREAKS[config.get("tie_break", "fifo")]):
+        if node is None:
+            break
+        expansions += 1
+        if problem.is_goal(node.state):
+            goal = node
+            break
+
+    actions = None
+    if goal is not None:
+        actions = interleave_actions([(order[line_idx], cell)
+                                      for line_idx, cell in problem.solution(goal)], len(order))
+    return {
+        "config": config,
+        "solved": goal is not None,
+        "cost": goal.depth if goal is not None else None,
+        "actions": actions,
+        "expansions": expansions,
+        "wall_time": time.perf_counter() - start_time,
+        # 无解时任何配置都已穷尽状态空间；有解时只有可采纳启发函数能证明最优
+        "proven": goal is None or config["heuristic"] in ADMISSIBLE_HEURISTICS,
+    }
+
+def config_worker(index, task, results):
+    """
+    工作进程入口：用一种配置求解实例，把 (配置序号, 结果, 异常) 放入结果队列。
+    :param index: 配置序号
+    :param task: 传给 run_config 的 (实例字典, 配置字典, 搜索引擎名称)
+    :param results: 结果队列（multiprocessing.Queue）
+    """
+    try:
+        result = run_config(task)
+    except Exception as e:
+        results.put((index, None, e))
+    else:
+        results.put((index, result, None))
+
+def solve_portfolio(instance, configs=None, workers=None, engine="list", stop=None):
+    """
+    为每种配置启动一个工作进程（同时最多 workers 个），通过队列收集结果。
+    第一个可证明最优（或证明无解）的结果胜出，其余进程随即被终止并回收；
+    所有配置都结束而没有可证明的结果时，返回成本最低的解。
+    :param instance: 实例字典，格式见 CrossLineCLI.build_problem
+    :param configs: 配置列表，每个配置包含 heuristic、tie_break、order、prune，默认为 PORTFOLIO
+    :param workers: 同时运行的工作进程数，默认为配置数与 CPU 核数中较小者
+    :param engine: 搜索引擎名称
+    :param stop: 可选的无参函数，返回 True 时放弃求解并返回 None（供界面取消使用）
+    :return: 胜出的结果字典（见 run_config），被取消时返回 None
+    """
+    configs = configs or PORTFOLIO
+    workers = workers or min(len(configs), os.cpu_count() or 1)
+    build_problem(instance)  # 在主进程中提前检查实例格式
+
+    results = multiprocessing.Queue()
+    waiting = list(enumerate(configs))
+    waiting.reverse()
+    running = {}  # 配置序号 -> 工作进程
+    best = None
+    try:
+        while waiting or running:
+            while waiting and len(running) < workers:
+                index, config = waiting.pop()
+                process = multiprocessing.Process(
+                    target=config_worker, args=(index, (instance, config, engine), results),
+                    daemon=True)
+                process.start()
+                running[index] = process
+            if stop is not None and stop():
+                return None
+            try:
+                index, result, error = results.get(timeout=0.1)
+            except queue.Empty:
+                # 正常退出的进程一定已把结果写入队列，异常终止（例如被杀死）的进程则不会
+                for index, process in running.items():
+                    if process.exitcode not in (None, 0):
+                        raise RuntimeError(
+                            f"Configuration {index} exited with code {process.exitcode}")
+                continue
+            running.pop(index).join()
+            if error is not None:
+                raise error
+            if result["proven"]:
+                return result
+            if result["solved"] and (best is None or result["cost"] < best["cost"]):
+                best = result
+        return best
+    finally:
+        # 终止仍在运行的配置并回收进程；队列随之丢弃，不再读取
+        for process in running.values():
+            process.terminate()
+        for process in running.values():
+            process.join()
+        results.close()
+
+def main(argv=None):
+    """
+    命令行入口：对每个实例运行组合求解，并以 JSONL 格式逐行输出结果。
+    :param argv: 命令行参数，默认为 sys.argv[1:]
+    :return: 退出码
+    """
+    parser = argparse.ArgumentParser(
+        description="Solve each instance with a portfolio of search configurations in parallel.")
+    parser.add_argument("inputs", nargs="*",
+                        help="JSON or JSONL instance files ('-' or none reads stdin)")
+    parser.add_argument("--engine", choices=["list", "bitboard"], default="list")
+    parser.add_argument("--configs", help="JSON file with a list of configurations")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes per instance "
+                             "(default: one per configuration, at most the number of CPUs)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output JSONL file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    configs = None
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as f:
+            configs = json.load(f)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for instance in read_instances(args.inputs):
+            result = {"id": instance.get("id")}
+            start_time = time.perf_counter()
+            try:
+                winner = solve_portfolio(instance, configs, args.workers, args.engine)
+            except (IndexError, KeyError, TypeError, ValueError) as e:
+                result["error"] = str(e)
+            else:
+                n = int(instance["n"])
+                result["solved"] = winner["solved"]
+                result["cost"] = winner["cost"]
+                result["proven"] = winner["proven"]
+                result["path"] = None
+                if winner["actions"] is not None:
+                    result["path"] = [[line_idx + 1, cell // n + 1, cell % n + 1]
+                                      for line_idx, cell in winner["actions"]]
+                result["config"] = winner["config"]
+                result["expansions"] = winner["expansions"]
+                result["wall_time"] = time.perf_counter() - start_time
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
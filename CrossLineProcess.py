@@ -0,0 +1,276 @@
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+from CrossLineSolver import MatchProblem, SearchStats, State, h_function_null, search_generator
+
+# 帧中保存的 SearchStats 计数器，耗时按 SearchStats.PHASES 的顺序保存
+COUNTERS = ("expanded", "generated", "duplicates", "reopened", "heuristic_calls",
+            "open_peak", "closed_peak")
+
+# 子进程两次发布帧之间的最短间隔（秒）；有动画延迟时每个节点都发布
+PUBLISH_INTERVAL = 1 / 120
+
+class FrameChannel(object):
+    # 缓冲区头部：已写入的帧数
+    HEADER = struct.Struct("<Q")
+    # 帧头：序号、步数、路径成本、g 值、活动线路（-1 表示无）、是否结束、是否有统计、计数器、各阶段耗时
+    FRAME = struct.Struct("<Qqddibb" + "q" * len(COUNTERS) + "d" * len(SearchStats.PHASES))
+    # 帧尾：与帧头相同的序号，两者一致说明读取期间没有被覆盖
+    TAIL = struct.Struct("<Q")
+
+    def __init__(self, n, m, slots=8, name=None):
+        """
+        初始化基于共享内存的帧环形缓冲区。
+        搜索子进程写入当前节点的快照（网格、起点、成本）和统计计数器，
+        界面进程只读取最新的完整帧；每帧首尾各有一个序号，读取时二者不一致则重读。
+        :param n: 网格大小
+        :param m: 线路数量
+        :param slots: 环形缓冲区的帧数
+        :param name: 已有共享内存块的名称，为 None 时新建（由创建者负责 unlink）
+        """
+        self.n = n
+        self.m = m
+        self.slots = slots
+        self.heads_format = struct.Struct(f"<{m}i")
+        self.frame_size = (self.FRAME.size + self.heads_format.size + n * n + self.TAIL.size)
+        size = self.HEADER.size + slots * self.frame_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.HEADER.pack_into(self.shm.buf, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.count = 0  # 写入端已写入的帧数
+
+    def offset(self, seq):
+        """
+        计算第 seq 帧（从 1 开始）在缓冲区中的起始位置。
+        :param seq: 帧序号
+        :return: 字节偏移量
+        """
+        return self.HEADER.size + (seq - 1) % self.slots * self.frame_size
+
+    def write(self, step, node, stats=None, done=False):
+        """
+        写入一帧，覆盖最旧的帧，写完后再更新头部的帧数。
+        :param step: 已生成的节点数
+        :param node: 当前节点，为 None 时只写入计数
+        :param stats: 可选的 SearchStats 对象
+        :param done: 搜索是否已结束
+        """
+        self.count += 1
+        seq = self.count
+        buf = self.shm.buf
+        pos = self.offset(seq)
+        if node is not None:
+            state = node.state
+            active_line = state.active_line if state.active_line is not None else -1
+            path_cost, depth = node.path_cost, node.depth
+        else:
+            state, active_line, path_cost, depth = None, -1, 0.0, 0.0
+        if stats is not None:
+            counters = [getattr(stats, name) for name in COUNTERS]
+            times = [stats.times[phase] for phase in SearchStats.PHASES]
+        else:
+            counters = [0] * len(COUNTERS)
+            times = [0.0] * len(SearchStats.PHASES)
+        self.FRAME.pack_into(buf, pos, seq, step, path_cost, depth, active_line, done,
+                             stats is not None, *counters, *times)
+        pos += self.FRAME.size
+        if state is not None:
+            self.heads_format.pack_into(buf, pos, *state.heads)
+            buf[pos + self.heads_format.size:pos + self.heads_format.size + self.n * self.n] = \
+                state.grid
+        else:
+            self.heads_format.pack_into(buf, pos, *([-1] * self.m))
+        pos += self.heads_format.size + self.n * self.n
+        self.TAIL.pack_into(buf, pos, seq)
+        self.HEADER.pack_into(buf, 0, seq)
+
+    def read(self):
+        """
+        读取最新的完整帧。
+        :return: 帧字典，包含 step、path_cost、depth、active_line、done、stats（无统计时为 None）、
+                 heads（无节点时为 None）和 grid；尚未写入任何帧时返回 None
+        """
+        buf = self.shm.buf
+        while True:
+            seq = self.HEADER.unpack_from(buf, 0)[0]
+            if seq == 0:
+                return None
+            pos = self.offset(seq)
+            raw = bytes(buf[pos:pos + self.frame_size])
+            fields = self.FRAME.unpack_from(raw, 0)
+            tail = self.TAIL.unpack_from(raw, self.frame_size - self.TAIL.size)[0]
+            if fields[0] == seq and tail == seq:
+                break  # 读取期间该帧没有被覆盖
+        _, step, path_cost, depth, active_line, done, has_stats = fields[:7]
+        stats = None
+        if has_stats:
+            stats = SearchStats()
+            for name, value in zip(COUNTERS, fields[7:7 + len(COUNTERS)]):
+                setattr(stats, name, value)
+            stats.times = dict(zip(SearchStats.PHASES, fields[7 + len(COUNTERS):]))
+        heads = self.heads_format.unpack_from(raw, self.FRAME.size)
+        grid_pos = self.FRAME.size + self.heads_format.size
+        return {
+            "step": step,
+            "path_cost": path_cost,
+            "depth": depth,
+            "active_line": active_line if active_line >= 0 else None,
+            "done": bool(done),
+            "stats": stats,
+            "heads": heads if heads[0] >= 0 else None,
+            "grid": raw[grid_pos:grid_pos + self.n * self.n],
+        }
+
+    def close(self):
+        """
+        关闭本进程对共享内存的映射。
+        """
+        self.shm.close()
+
+    def unlink(self):
+        """
+        释放共享内存块，由创建者在双方都不再使用后调用。
+        """
+        self.shm.unlink()
+
+def search_worker(name, n, lines, mode, path_cost, h_function, profile, control, slots):
+    """
+    搜索子进程入口：全速运行 search_generator，并把快照写入共享内存帧缓冲区，
+    两次写入至少间隔 PUBLISH_INTERVAL，界面按自己的间隔取样绘制。
+    每生成一个节点检查一次控制管道：("pause",) 暂停并阻塞等待下一条消息，("resume",) 继续，
+    ("cancel",) 结束搜索。
+    :param name: 共享内存块名称
+    :param n: 网格大小
+    :param lines: 线路列表，每个元素为 [起点, 终点]，坐标格式为 [行, 列]（从 0 开始）
+    :param mode: 搜索模式
+    :param path_cost: 初始路径成本
+    :param h_function: 启发函数
+    :param profile: 是否记录 SearchStats 统计信息
+    :param control: 控制管道的子进程端
+    :param slots: 环形缓冲区的帧数
+    """
+    channel = FrameChannel(n, len(lines), slots, name)
+    problem = MatchProblem(n, State.initial(n, lines), h_function=h_function,
+                           path_cost=path_cost, mode=mode)
+    stats = SearchStats() if profile else None
+    step = 0
+    last = None
+    last_publish = 0.0
+    paused = False
+    cancelled = False
+    try:
+        for node in search_generator(problem, stats):
+            if node is None:
+                break
+            step += 1
+            last = node
+            now = time.perf_counter()
+            if now - last_publish >= PUBLISH_INTERVAL:
+                channel.write(step, node, stats)
+                last_publish = now
+
+            # 处理控制消息，暂停时阻塞等待
+            while paused or control.poll():
+                message = control.recv()
+                if message[0] == "pause":
+                    paused = True
+                elif message[0] == "resume":
+                    paused = False
+                elif message[0] == "cancel":
+                    cancelled = True
+                    break
+            if cancelled:
+                break
+    except (EOFError, BrokenPipeError):
+        pass  # 界面进程已关闭控制管道
+    finally:
+        channel.write(step, last, stats, done=True)
+        channel.close()
+        control.close()
+
+class SearchProcess(object):
+    def __init__(self, n, lines, mode, path_cost=0, h_function=h_function_null, profile=False,
+                 slots=8):
+        """
+        在子进程中运行搜索，使其不与界面共享 GIL。
+        快照通过共享内存帧缓冲区（FrameChannel）传回，暂停、继续和取消通过控制管道发送。
+        :param n: 网格大小
+        :param lines: 线路列表，每个元素为 [起点, 终点]，坐标格式为 [行, 列]（从 0 开始）
+        :param mode: 搜索模式
+        :param path_cost: 初始路径成本
+        :param h_function: 启发函数，必须是模块级函数以便传给子进程
+        :param profile: 是否记录 SearchStats 统计信息
+        :param slots: 环形缓冲区的帧数
+        """
+        self.n = n
+        self.ends = tuple(end[0] * n + end[1] for _, end in lines)
+        self.channel = FrameChannel(n, len(lines), slots)
+        self.control, child_control = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=search_worker,
+            args=(self.channel.name, n, [list(map(list, line)) for line in lines], mode,
+                  path_cost, h_function, profile, child_control, slots),
+            daemon=True)
+        self.process.start()
+        child_control.close()
+
+    def send(self, *message):
+        """
+        向子进程发送控制消息，子进程已结束时忽略。
+        :param message: 消息内容，如 "pause"、"resume" 或 "cancel"
+        """
+        try:
+            self.control.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def pause(self):
+        """
+        暂停搜索。
+        """
+        self.send("pause")
+
+    def resume(self):
+        """
+        继续搜索。
+        """
+        self.send("resume")
+
+    def is_alive(self):
+        """
+        判断子进程是否仍在运行。
+        :return: 运行中返回 True
+        """
+        return self.process.is_alive()
+
+    def latest(self):
+        """
+        读取子进程发布的最新帧，并还原其中的状态。
+        :return: 帧字典（见 FrameChannel.read），另含 state（无节点时为 None）；尚无帧时返回 None
+        """
+        frame = self.channel.read()
+        if frame is None:
+            return None
+        frame["state"] = None
+        if frame["heads"] is not None:
+            frame["state"] = State(self.n, frame["grid"], frame["heads"], self.ends,
+                                   frame["active_line"])
+        return frame
+
+    def close(self):
+        """
+        取消搜索，等待子进程结束（超时则强制终止），然后释放管道和共享内存。
+        """
+        self.send("cancel")
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.control.close()
+        self.channel.close()
+        self.channel.unlink()
@@ -0,0 +1,1960 @@
+import functools
+import heapq
+import random
+import sys
+import time
+
+class PriorityQueue:
+    def __init__(self, initial=None, key=None, tie_break=None, cost=None):
+        """
+        初始化优先队列。
+        使用二叉堆实现，元素按 (路径成本, 平局裁决值, 插入序号) 排序，
+        并维护状态键到堆位置的索引，使查找为 O(1)，替换为 O(log n)。
+        :param initial: 初始元素
+        :param key: 由节点计算去重键的函数，默认为 state_key(node.state)；搜索时传入 problem.node_key
+        :param tie_break: 路径成本相同时的裁决函数，值越小越优先，默认按插入顺序
+        :param cost: 计算排序成本的函数，默认为节点的 path_cost
+        """
+        self.elements = []  # 按堆序存放的节点
+        self.priorities = []  # 与 elements 一一对应的排序键
+        self.item_keys = []  # 与 elements 一一对应的状态键
+        self.index = {}  # 状态键 -> 堆中位置
+        self.counter = 0  # 插入序号，保证相同优先级时先进先出
+        self.key = key if key is not None else (lambda node: state_key(node.state))
+        self.tie_break = tie_break
+        self.cost = cost
+        if initial:
+            self.push(initial)
+
+    def __len__(self):
+        """
+        返回队列中的元素个数。
+        :return: 元素个数
+        """
+        return len(self.elements)
+
+    def empty(self):
+        """
+        判断队列是否为空。
+        :return: 队列为空返回 True，否则返回 False
+        """
+        return len(self.elements) == 0
+
+    def priority(self, item, count):
+        """
+        计算元素的排序键。
+        :param item: 元素
+        :param count: 元素的插入序号
+        :return: 排序键 (路径成本, 平局裁决值, 插入序号)
+        """
+        tie = self.tie_break(item) if self.tie_break is not None else 0
+        cost = self.cost(item) if self.cost is not None else item.path_cost
+        return (cost, tie, count)
+
+    def swap(self, i, j):
+        """
+        交换堆中两个位置的元素，并同步更新索引。
+        :param i: 第一个位置
+        :param j: 第二个位置
+        """
+        elements, priorities, item_keys = self.elements, self.priorities, self.item_keys
+        elements[i], elements[j] = elements[j], elements[i]
+        priorities[i], priorities[j] = priorities[j], priorities[i]
+        item_keys[i], item_keys[j] = item_keys[j], item_keys[i]
+        self.index[item_keys[i]] = i
+        self.index[item_keys[j]] = j
+
+    def sift_up(self, pos):
+        """
+        将指定位置的元素向堆顶方向调整。
+        :param pos: 元素位置
+        """
+        priorities = self.priorities
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            if priorities[pos] < priorities[parent]:
+                self.swap(pos, parent)
+                pos = parent
+            else:
+                break
+
+    def sift_down(self, pos):
+        """
+        将指定位置的元素向堆底方向调整。
+        :param pos: 元素位置
+        """
+        priorities = self.priorities
+        size = len(priorities)
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            if child + 1 < size and priorities[child + 1] < priorities[child]:
+                child += 1
+            if priorities[child] < priorities[pos]:
+                self.swap(pos, child)
+                pos = child
+            else:
+                break
+
+    def push(self, item, item_key=None):
+        """
+        向队列中添加元素，并按路径成本维护堆序。
+        若队列中已有相同状态的元素，则按 compare_and_replace 处理。
+        :param item: 要添加的元素
+        :param item_key: 已计算好的去重键，为 None 时由 key 函数计算
+        """
+        if item_key is None:
+            item_key = self.key(item)
+        if item_key in self.index:
+            self.compare_and_replace(self.index[item_key], item)
+            return
+        self.counter += 1
+        pos = len(self.elements)
+        self.elements.append(item)
+        self.priorities.append(self.priority(item, self.counter))
+        self.item_keys.append(item_key)
+        self.index[item_key] = pos
+        self.sift_up(pos)
+
+    def pop(self):
+        """
+        从队列中移除并返回路径成本最小的元素。
+        :return: 路径成本最小的元素
+        """
+        last = len(self.elements) - 1
+        if last > 0:
+            self.swap(0, last)
+        item = self.elements.pop()
+        self.priorities.pop()
+        del self.index[self.item_keys.pop()]
+        if self.elements:
+            self.sift_down(0)
+        return item
+
+    def find(self, item, item_key=None):
+        """
+        查找元素在队列中的索引。
+        :param item: 要查找的元素
+        :param item_key: 已计算好的去重键，为 None 时由 key 函数计算
+        :return: 元素的索引，如果未找到返回 -1
+        """
+        if item_key is None:
+            item_key = self.key(item)
+        return self.index.get(item_key, -1)
+
+    def compare_and_replace(self, index, new_item):
+        """
+        如果新元素的路径成本更小，则替换队列中指定索引的元素（decrease-key）。
+        替换后的元素沿用原插入序号，只需向堆顶方向调整。
+        :param index: 要替换的元素的索引
+        :param new_item: 新元素
+        """
+        if 0 <= index < len(self.elements):
+            if new_item.path_cost < self.elements[index].path_cost:
+                count = self.priorities[index][2]
+                self.elements[index] = new_item
+                self.priorities[index] = self.priority(new_item, count)
+                self.sift_up(index)
+
+class Set:
+    def __init__(self, measure=False):
+        """
+        初始化集合。
+        使用哈希集合存储状态键，添加和查询均为 O(1)。
+        :param measure: 是否在添加时累计键对象占用的内存，供 memory_usage 使用
+        """
+        self.elements = set()
+        self.key_bytes = 0  # 已存储键对象占用的字节数
+        # 已计入 key_bytes 的对象 id，键之间共享的网格行等对象只计一次；不统计时为 None
+        self.counted = set() if measure else None
+
+    def __len__(self):
+        """
+        返回集合中的元素个数。
+        :return: 元素个数
+        """
+        return len(self.elements)
+
+    def add(self, item):
+        """
+        向集合中添加元素，如果元素不存在。
+        :param item: 要添加的元素
+        """
+        if item not in self.elements:
+            self.elements.add(item)
+            if self.counted is not None:
+                self.key_bytes += self.object_size(item)
+
+    def object_size(self, item):
+        """
+        计算键对象及其嵌套元组、状态对象的各字段中尚未计入的对象占用的字节数。
+        :param item: 键对象
+        :return: 新增的字节数
+        """
+        size = 0
+        stack = [item]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in self.counted:
+                continue
+            self.counted.add(id(obj))
+            size += sys.getsizeof(obj)
+            if isinstance(obj, tuple):
+                stack.extend(obj)
+            elif isinstance(obj, (State, BitState)):
+                stack.extend(getattr(obj, name) for name in obj.__slots__)
+        return size
+
+    def include(self, item):
+        """
+        判断集合中是否包含指定元素。
+        :param item: 要判断的元素
+        :return: 包含返回 True，否则返回 False
+        """
+        return item in self.elements
+
+    def memory_usage(self):
+        """
+        估算集合占用的内存，包括哈希表本身和所有键对象。
+        只有以 measure=True 创建的集合才统计键对象。
+        :return: 占用的字节数
+        """
+        return sys.getsizeof(self.elements) + self.key_bytes
+
+@functools.lru_cache(maxsize=None)
+def zobrist_tables(n, m):
+    """
+    生成 n×n 网格、m 条线路的 Zobrist 随机数表，按 (n, m) 缓存。
+    使用固定种子，保证不同进程中同一问题的状态键一致。
+    :param n: 网格大小
+    :param m: 线路数量
+    :return: (占用表, 起点表, 活动线路表)，前两者按 [线路][格子] 索引，
+             活动线路表按线路索引，最后一项对应 None
+    """
+    rng = random.Random(n * 1000003 + m)
+    cells = tuple(tuple(rng.getrandbits(64) for _ in range(n * n)) for _ in range(m))
+    heads = tuple(tuple(rng.getrandbits(64) for _ in range(n * n)) for _ in range(m))
+    active = tuple(rng.getrandbits(64) for _ in range(m + 1))
+    return cells, heads, active
+
+def zobrist_hash(n, owners, heads, active_line):
+    """
+    从头计算状态的 64 位 Zobrist 键。
+    搜索中的子状态应由父状态的键增量更新，只有初始状态需要调用此函数。
+    :param n: 网格大小
+    :param owners: 可迭代的 (线路索引, 格子) 占用对
+    :param heads: 各线路当前起点
+    :param active_line: 活动线路索引，可为 None
+    :return: Zobrist 键
+    """
+    m = len(heads)
+    cells_z, heads_z, active_z = zobrist_tables(n, m)
+    key = active_z[m if active_line is None else active_line]
+    for line_idx, cell in owners:
+        key ^= cells_z[line_idx][cell]
+    for line_idx, cell in enumerate(heads):
+        key ^= heads_z[line_idx][cell]
+    return key
+
+class State(object):
+    __slots__ = ('n', 'grid', 'heads', 'ends', 'active_line', 'key', 'masks', 'occupied')
+
+    def __init__(self, n, grid, heads, ends, active_line, key=None, masks=None, occupied=None):
+        """
+        初始化不可变的紧凑状态。
+        格子按 行 * n + 列 编码为一个整数，网格占用存放在扁平的 bytes 中，
+        生成子状态时只需复制一个小缓冲区并修改一个格子。
+        同时保存各线路的占用位掩码，供启发函数用位运算统计障碍物。
+        :param n: 网格大小
+        :param grid: 扁平网格（bytes），0 表示空，i+1 表示被第 i 条线路占据
+        :param heads: 各线路当前起点（编码后的格子）组成的元组
+        :param ends: 各线路终点（编码后的格子）组成的元组，搜索过程中共享
+        :param active_line: 活动线路索引，所有线路完成时为 None
+        :param key: 由父状态增量计算的 Zobrist 键，为 None 时从头计算
+        :param masks: 由父状态增量更新的各线路占用位掩码，为 None 时由 grid 计算
+        :param occupied: 所有线路占用的合并位掩码，与 masks 一同给出
+        """
+        self.n = n
+        self.grid = grid
+        self.heads = heads
+        self.ends = ends
+        self.active_line = active_line
+        if key is None:
+            owners = [(value - 1, cell) for cell, value in enumerate(grid) if value]
+            key = zobrist_hash(n, owners, heads, active_line)
+        self.key = key
+        if masks is None:
+            line_masks = [0] * len(heads)
+            occupied = 0
+            for cell, value in enumerate(grid):
+                if value:
+                    line_masks[value - 1] |= 1 << cell
+                    occupied |= 1 << cell
+            masks = tuple(line_masks)
+        self.masks = masks
+        self.occupied = occupied
+
+    @classmethod
+    def initial(cls, n, lines):
+        """
+        由线路的起点和终点坐标创建初始状态。
+        找到第一个未完成的线路作为活动线路。
+        :param n: 网格大小
+        :param lines: 线路列表，每个元素为 [起点, 终点]，坐标格式为 [行, 列]
+        :return: 初始状态
+        """
+        grid = bytearray(n * n)
+        heads = []
+        ends = []
+        for i, (start, end) in enumerate(lines):
+            heads.append(start[0] * n + start[1])
+            ends.append(end[0] * n + end[1])
+            grid[heads[-1]] = i + 1
+            grid[ends[-1]] = i + 1
+        active_line = None
+        for idx, (start, end) in enumerate(zip(heads, ends)):
+            if start != end:
+                active_line = idx
+                break
+        return cls(n, bytes(grid), tuple(heads), tuple(ends), active_line)
+
+    @classmethod
+    def from_lists(cls, state):
+        """
+        由旧的嵌套列表状态 [grid, lines, active_line] 创建紧凑状态。
+        :param state: 嵌套列表形式的状态
+        :return: 紧凑状态
+        """
+        grid, lines, active_line = state
+        n = len(grid)
+        flat = bytes(value for row in grid for value in row)
+        heads = tuple(start[0] * n + start[1] for start, _ in lines)
+        ends = tuple(end[0] * n + end[1] for _, end in lines)
+        return cls(n, flat, heads, ends, active_line)
+
+    def loc(self, cell):
+        """
+        将编码后的格子还原为坐标。
+        :param cell: 编码后的格子
+        :return: 坐标 (行, 列)
+        """
+        return divmod(cell, self.n)
+
+    def value(self, row, col):
+        """
+        获取指定坐标的占用值。
+        :param row: 行
+        :param col: 列
+        :return: 0 表示空，i+1 表示被第 i 条线路占据
+        """
+        return self.grid[row * self.n + col]
+
+    def lines(self):
+        """
+        获取各线路当前起点和终点的坐标。
+        :return: 线路列表，每个元素为 (起点, 终点)，坐标格式为 (行, 列)
+        """
+        return [(self.loc(start), self.loc(end)) for start, end in zip(self.heads, self.ends)]
+
+    def __eq__(self, other):
+        """
+        比较两个状态是否相等。先比较 Zobrist 键，相同时再比较完整的网格、起点和活动线路，
+        因此 Zobrist 键冲突的不同状态不会被当成同一状态。终点在同一问题中不变，不参与比较。
+        :param other: 另一个状态
+        :return: 相等返回 True，否则返回 False
+        """
+        return self is other or (isinstance(other, State) and self.key == other.key
+                                 and self.grid == other.grid and self.heads == other.heads
+                                 and self.active_line == other.active_line)
+
+    def __hash__(self):
+        """
+        返回状态的 Zobrist 键作为哈希值，无需读取网格。
+        :return: 哈希值
+        """
+        return self.key
+
+@functools.lru_cache(maxsize=None)
+def neighbor_masks(n):
+    """
+    预计算 n×n 网格中每个格子的相邻格子位掩码。
+    :param n: 网格大小
+    :return: 元组，第 cell 个元素为该格子上下左右相邻格子的位掩码
+    """
+    masks = []
+    for cell in range(n * n):
+        row, col = divmod(cell, n)
+        mask = 0
+        if row > 0:
+            mask |= 1 << (cell - n)
+        if row < n - 1:
+            mask |= 1 << (cell + n)
+        if col > 0:
+            mask |= 1 << (cell - 1)
+        if col < n - 1:
+            mask |= 1 << (cell + 1)
+        masks.append(mask)
+    return tuple(masks)
+
+@functools.lru_cache(maxsize=None)
+def neighbor_cells(n):
+    """
+    预计算 n×n 网格中每个格子的相邻格子。
+    :param n: 网格大小
+    :return: 元组，第 cell 个元素为该格子上下左右相邻格子组成的元组
+    """
+    cells = []
+    for cell in range(n * n):
+        row, col = divmod(cell, n)
+        near = []
+        if row > 0:
+            near.append(cell - n)
+        if row < n - 1:
+            near.append(cell + n)
+        if col > 0:
+            near.append(cell - 1)
+        if col < n - 1:
+            near.append(cell + 1)
+        cells.append(tuple(near))
+    return tuple(cells)
+
+class BitState(object):
+    __slots__ = ('n', 'masks', 'occupied', 'pending', 'heads', 'ends', 'active_line', 'key')
+
+    def __init__(self, n, masks, occupied, pending, heads, ends, active_line, key=None):
+        """
+        初始化位棋盘形式的不可变状态。
+        每条线路的占用用一个 Python 整数位掩码表示，第 cell 位对应编码为 cell 的格子。
+        :param n: 网格大小
+        :param masks: 各线路占用位掩码组成的元组
+        :param occupied: 所有线路占用的合并位掩码
+        :param pending: 未完成线路的位掩码，第 i 位表示第 i 条线路未完成
+        :param heads: 各线路当前起点（编码后的格子）组成的元组
+        :param ends: 各线路终点（编码后的格子）组成的元组
+        :param active_line: 活动线路索引，所有线路完成时为 None
+        :param key: 由父状态增量计算的 Zobrist 键，为 None 时从头计算
+        """
+        self.n = n
+        self.masks = masks
+        self.occupied = occupied
+        self.pending = pending
+        self.heads = heads
+        self.ends = ends
+        self.active_line = active_line
+        if key is None:
+            owners = []
+            for line_idx, mask in enumerate(masks):
+                while mask:
+                    low = mask & -mask
+                    owners.append((line_idx, low.bit_length() - 1))
+                    mask ^= low
+            key = zobrist_hash(n, owners, heads, active_line)
+        self.key = key
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        由紧凑状态创建位棋盘状态。
+        :param state: 紧凑状态（State）
+        :return: 位棋盘状态
+        """
+        pending = 0
+        for i, (start, end) in enumerate(zip(state.heads, state.ends)):
+            if start != end:
+                pending |= 1 << i
+        return cls(state.n, state.masks, state.occupied, pending,
+                   state.heads, state.ends, state.active_line, state.key)
+
+    @property
+    def grid(self):
+        """
+        扁平网格（bytes），用于与基于 State 的启发函数和绘制代码兼容。
+        :return: 扁平网格
+        """
+        grid = bytearray(self.n * self.n)
+        for i, mask in enumerate(self.masks):
+            while mask:
+                low = mask & -mask
+                grid[low.bit_length() - 1] = i + 1
+                mask ^= low
+        return bytes(grid)
+
+    def loc(self, cell):
+        """
+        将编码后的格子还原为坐标。
+        :param cell: 编码后的格子
+        :return: 坐标 (行, 列)
+        """
+        return divmod(cell, self.n)
+
+    def value(self, row, col):
+        """
+        获取指定坐标的占用值。
+        :param row: 行
+        :param col: 列
+        :return: 0 表示空，i+1 表示被第 i 条线路占据
+        """
+        bit = 1 << (row * self.n + col)
+        if not self.occupied & bit:
+            return 0
+        for i, mask in enumerate(self.masks):
+            if mask & bit:
+                return i + 1
+        return 0
+
+    def lines(self):
+        """
+        获取各线路当前起点和终点的坐标。
+        :return: 线路列表，每个元素为 (起点, 终点)，坐标格式为 (行, 列)
+        """
+        return [(self.loc(start), self.loc(end)) for start, end in zip(self.heads, self.ends)]
+
+    def __eq__(self, other):
+        """
+        比较两个状态是否相等。先比较 Zobrist 键，相同时再比较完整的占用位掩码、起点和活动线路。
+        :param other: 另一个状态
+        :return: 相等返回 True，否则返回 False
+        """
+        return self is other or (isinstance(other, BitState) and self.key == other.key
+                                 and self.masks == other.masks and self.heads == other.heads
+                                 and self.active_line == other.active_line)
+
+    def __hash__(self):
+        """
+        返回状态的 Zobrist 键作为哈希值。
+        :return: 哈希值
+        """
+        return self.key
+
+def state_key(state):
+    """
+    获取状态的去重键，用于开放表和关闭集合的哈希去重。
+    键就是状态本身：哈希值为增量维护的 Zobrist 键（O(1)，无需每次构造元组或读取网格），
+    相等比较检查完整的占用、起点和活动线路，两个不同状态即使 Zobrist 键冲突也不会被当成同一状态。
+    需要一个整数时（如 HDA* 按状态分配进程）直接使用 state.key。
+    :param state: 当前状态（State 或 BitState）
+    :return: 状态键
+    """
+    return state
+
+def Manhattan_distance(loc1, loc2):
+    """
+    计算两个位置之间的曼哈顿距离。
+    :param loc1: 第一个位置，格式为 [行, 列]
+    :param loc2: 第二个位置，格式为 [行, 列]
+    :return: 曼哈顿距离
+    """
+    return abs(loc1[0] - loc2[0]) + abs(loc1[1] - loc2[1])
+
+def h_function_null(state):
+    """
+    空启发函数，始终返回 0。
+    :param state: 当前状态
+    :return: 0
+    """
+    return 0
+
+def h_function_method1(state):
+    """
+    启发函数方法 1，计算所有线路起点到终点的曼哈顿距离之和。
+    :param state: 当前状态
+    :return: 曼哈顿距离之和
+    """
+    n = state.n
+    ans = 0
+    for start, end in zip(state.heads, state.ends):
+        sr, sc = divmod(start, n)
+        er, ec = divmod(end, n)
+        ans += abs(sr - er) + abs(sc - ec)
+    return ans
+
+def generate_horizontal_path(start, end):
+    """
+    生成横向优先的曼哈顿路径。
+    先横向移动，再纵向移动。
+    :param start: 起点，格式为 [行, 列]
+    :param end: 终点，格式为 [行, 列]
+    :return: 路径列表，每个元素为 [行, 列]
+    """
+    path = []
+    sx, sy = start
+    ex, ey = end
+    
+    # 横向移动（X轴）
+    step_x = 1 if ex > sx else -1
+    for x in range(sx, ex, step_x):
+        path.append((x, sy))
+    path.append((ex, sy))
+    
+    # 纵向移动（Y轴）
+    step_y = 1 if ey > sy else -1
+    for y in range(sy, ey, step_y):
+        path.append((ex, y))
+    return path
+
+def generate_vertical_path(start, end):
+    """
+    生成纵向优先的曼哈顿路径。
+    先纵向移动，再横向移动。
+    :param start: 起点，格式为 [行, 列]
+    :param end: 终点，格式为 [行, 列]
+    :return: 路径列表，每个元素为 [行, 列]
+    """
+    path = []
+    sx, sy = start
+    ex, ey = end
+    
+    # 纵向移动（Y轴）
+    step_y = 1 if ey > sy else -1
+    for y in range(sy, ey, step_y):
+        path.append((sx, y))
+    path.append((sx, ey))
+    
+    # 横向移动（X轴）
+    step_x = 1 if ex > sx else -1
+    for x in range(sx, ex, step_x):
+        path.append((x, ey))
+    return path
+
+def h_function_method2(state):
+    """
+    改进的启发函数：曼哈顿距离 + 障碍物惩罚。
+    对于每条未完成的线路，计算其曼哈顿距离和障碍物最少的路径的障碍物数量，
+    并将障碍物数量乘以惩罚系数（2）加到曼哈顿距离上。
+    :param state: 当前状态
+    :return: 启发函数值
+    """
+    total = 0
+    for line_idx in range(len(state.heads)):
+        total += method2_line_cost(state, line_idx)
+    return total
+
+@functools.lru_cache(maxsize=None)
+def l_path_table(n):
+    """
+    获取 n×n 网格的 L 形路径位掩码表，按 n 缓存。
+    表在使用时按 (起点, 终点) 惰性填充，见 l_path_entry。
+    :param n: 网格大小
+    :return: 字典，键为 起点 * n * n + 终点
+    """
+    return {}
+
+def l_path_entry(n, start, end):
+    """
+    计算起点到终点的两条 L 形路径的位掩码和曼哈顿距离。
+    路径与 generate_horizontal_path / generate_vertical_path 相同，掩码中不含终点。
+    这两个函数生成的路径中拐角格子出现两次，拐角处的障碍按两次计算，
+    因此另用一个掩码记录重复出现的格子。
+    :param n: 网格大小
+    :param start: 起点（编码后的格子）
+    :param end: 终点（编码后的格子）
+    :return: (横向路径掩码, 横向路径重复格子掩码, 纵向路径掩码, 纵向路径重复格子掩码,
+              两条路径的并集掩码, 曼哈顿距离)
+    """
+    start_loc = divmod(start, n)
+    end_loc = divmod(end, n)
+    entry = []
+    for path in (generate_horizontal_path(start_loc, end_loc),
+                 generate_vertical_path(start_loc, end_loc)):
+        mask = 0
+        repeated = 0
+        for x, y in path:
+            bit = 1 << (x * n + y)
+            if mask & bit:
+                repeated |= bit
+            mask |= bit
+        entry.append(mask & ~(1 << end))
+        entry.append(repeated & ~(1 << end))
+    entry.append(entry[0] | entry[2])
+    entry.append(Manhattan_distance(start_loc, end_loc))
+    return tuple(entry)
+
+def l_path_lookup(n, start, end):
+    """
+    查询起点到终点的 L 形路径位掩码，首次查询时计算并缓存。
+    :param n: 网格大小
+    :param start: 起点（编码后的格子）
+    :param end: 终点（编码后的格子）
+    :return: l_path_entry 的结果
+    """
+    table = l_path_table(n)
+    index = start * n * n + end
+    entry = table.get(index)
+    if entry is None:
+        entry = table[index] = l_path_entry(n, start, end)
+    return entry
+
+def method2_line_cost(state, line_idx):
+    """
+    计算 h_function_method2 中单条线路的贡献：曼哈顿距离 + 2 × 两条 L 形路径中较少的障碍物数量。
+    L 形路径的位掩码按网格大小预先缓存，障碍物数量即路径掩码与其他线路占用掩码按位与后的置位数。
+    :param state: 当前状态
+    :param line_idx: 线路索引
+    :return: 该线路的贡献，已完成的线路为 0
+    """
+    start = state.heads[line_idx]
+    end = state.ends[line_idx]
+    if start == end:
+        return 0  # 线路已完成
+    
+    mask_h, repeated_h, mask_v, repeated_v, _, md = l_path_lookup(state.n, start, end)
+    
+    # 其他线路占据的格子（排除当前线路自身）
+    others = state.occupied & ~state.masks[line_idx]
+    obstacles_h = (mask_h & others).bit_count() + (repeated_h & others).bit_count()
+    obstacles_v = (mask_v & others).bit_count() + (repeated_v & others).bit_count()
+    
+    # 取障碍较少的路径，并添加惩罚（每个障碍+2）
+    return md + 2 * min(obstacles_h, obstacles_v)
+
+def incremental(h_function):
+    """
+    将启发函数标记为增量启发函数。
+    增量启发函数的签名为 h(state, parts)，其中 parts 为父节点保存的中间结果（根节点为 None），
+    返回 (启发函数值, 本节点的中间结果)，中间结果由 Node.h_parts 保存并传给子节点。
+    :param h_function: 启发函数
+    :return: 标记后的启发函数
+    """
+    h_function.incremental = True
+    return h_function
+
+@incremental
+def h_function_method2_incremental(state, parts=None):
+    """
+    h_function_method2 的增量版本，结果与其完全相同。
+    每一步只有一条线路的起点移动、一个格子被占据，因此只需重新计算
+    起点移动的线路，以及 L 形路径经过新占据格子的线路，其余线路沿用父节点的贡献。
+    中间结果中保存各线路 L 形路径的并集掩码，判断是否受影响只需一次按位与，无需查表。
+    单次调用约为 h_function_method2 的 60%，但后者每条线路也只是几次位运算，
+    启发函数只占搜索时间的一小部分，整体搜索通常只快几个百分点。
+    :param state: 当前状态
+    :param parts: 父节点的 (各线路起点, 各线路贡献, 各线路 L 形路径并集掩码)，为 None 时全部重新计算
+    :return: (启发函数值, 本状态的中间结果)
+    """
+    heads = state.heads
+    ends = state.ends
+    n = state.n
+    if parts is None:
+        values = []
+        unions = []
+        for line_idx, head in enumerate(heads):
+            values.append(method2_line_cost(state, line_idx))
+            # 已完成线路的贡献恒为 0，并集掩码记为 0，之后不再重新计算
+            unions.append(l_path_lookup(n, head, ends[line_idx])[4] if head != ends[line_idx] else 0)
+        return sum(values), (heads, tuple(values), tuple(unions))
+    
+    old_heads, values, unions = parts
+    # 起点移动的线路，它们的新起点即新占据的格子
+    moved = [line_idx for line_idx, head in enumerate(heads) if head != old_heads[line_idx]]
+    if not moved:
+        return sum(values), (heads, values, unions)
+    new_cells = 0
+    for line_idx in moved:
+        new_cells |= 1 << heads[line_idx]
+    values = list(values)
+    unions = list(unions)
+    for line_idx, union in enumerate(unions):
+        if union & new_cells:
+            values[line_idx] = method2_line_cost(state, line_idx)
+    for line_idx in moved:
+        head = heads[line_idx]
+        end = ends[line_idx]
+        if not unions[line_idx] & new_cells:
+            values[line_idx] = method2_line_cost(state, line_idx)
+        unions[line_idx] = l_path_lookup(n, head, end)[4] if head != end else 0
+    return sum(values), (heads, tuple(values), tuple(unions))
+
+def distance_map(n, end, occupied):
+    """
+    从终点出发，经过空闲格子做广度优先搜索，得到各格子到终点的最短步数。
+    被占据的格子（如线路的起点）只作为路径的端点，不继续向外扩展。
+    :param n: 网格大小
+    :param end: 终点（编码后的格子）
+    :param occupied: 所有线路占据格子的位掩码
+    :return: 距离列表，无法到达的格子为 -1
+    """
+    near = neighbor_cells(n)
+    dist = [-1] * (n * n)
+    dist[end] = 0
+    frontier = [end]
+    step = 0
+    while frontier:
+        step += 1
+        next_frontier = []
+        for cell in frontier:
+            for neighbor in near[cell]:
+                if dist[neighbor] < 0:
+                    dist[neighbor] = step
+                    if not occupied >> neighbor & 1:
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return dist
+
+def shortest_path_exists(n, dist, head, end, occupied):
+    """
+    判断起点到终点是否仍有一条长度为 dist[head] 的路径：沿距离图每步减 1，且只经过当前空闲的格子。
+    距离图是在占用较少时计算的，dist[head] 是真实距离的下界，存在这样的路径时它就是真实距离。
+    :param n: 网格大小
+    :param dist: 缓存的距离图（distance_map 的结果）
+    :param head: 起点（编码后的格子）
+    :param end: 终点（编码后的格子）
+    :param occupied: 当前所有线路占据格子的位掩码
+    :return: 存在返回 True，否则返回 False
+    """
+    near = neighbor_cells(n)
+    stack = [head]
+    seen = {head}
+    while stack:
+        cell = stack.pop()
+        step = dist[cell] - 1
+        for neighbor in near[cell]:
+            if dist[neighbor] != step:
+                continue
+            if neighbor == end:
+                return True
+            if neighbor not in seen and not occupied >> neighbor & 1:
+                seen.add(neighbor)
+                stack.append(neighbor)
+    return False
+
+def h_function_distance(state):
+    """
+    真实距离启发函数：各未完成线路在当前空闲格子中从起点到终点的最短步数之和。
+    每一步只移动一条线路一格，且之后占据的格子只会增加，因此该函数可采纳。
+    :param state: 当前状态
+    :return: 最短步数之和，某条线路已被隔断时返回无穷大
+    """
+    n = state.n
+    total = 0
+    for head, end in zip(state.heads, state.ends):
+        if head == end:
+            continue
+        d = distance_map(n, end, state.occupied)[head]
+        if d < 0:
+            return float("inf")
+        total += d
+    return total
+
+@incremental
+def h_function_distance_incremental(state, parts=None):
+    """
+    h_function_distance 的增量版本，结果与其完全相同。
+    每条线路的距离图连同计算时的占用位掩码一起缓存，并沿搜索分支传给子节点。
+    占用只会增加，缓存的距离图始终是真实距离的下界。若此后新占据的每个格子 x 都满足
+    d[x] + 曼哈顿距离(x, 起点) > d[起点]，则没有最短路径经过这些格子；否则沿距离图查找
+    一条避开它们的最短路径（shortest_path_exists）。两者之一成立时起点的距离不变，继续使用
+    缓存的距离图，只有起点的距离确实变大时才重新搜索该线路。
+    :param state: 当前状态
+    :param parts: 父节点各线路的 (起点, 距离, 计算时的占用位掩码, 距离图) 元组，为 None 时全部重新计算
+    :return: (启发函数值, 本状态各线路的中间结果元组)
+    """
+    n = state.n
+    occupied = state.occupied
+    if parts is None:
+        parts = [None] * len(state.heads)
+    new_parts = []
+    total = 0
+    for head, end, part in zip(state.heads, state.ends, parts):
+        if head == end:
+            new_parts.append((head, 0, occupied, None))
+            continue
+        if part is not None and part[3] is not None:
+            _, _, occupied_then, dist = part
+            d = dist[head]
+            # 起点本身是路径端点，被占据不影响距离
+            newly = occupied & ~occupied_then & ~(1 << head)
+            if d >= 0:
+                hr, hc = divmod(head, n)
+                while newly:
+                    low = newly & -newly
+                    cell = low.bit_length() - 1
+                    if dist[cell] >= 0:
+                        cr, cc = divmod(cell, n)
+                        if dist[cell] + abs(cr - hr) + abs(cc - hc) <= d:
+                            if not shortest_path_exists(n, dist, head, end, occupied):
+                                part = None
+                            break
+                    newly ^= low
+            # d < 0 时线路已被隔断，占用增加后仍无法到达，缓存继续有效
+        else:
+            part = None
+        if part is None:
+            dist = distance_map(n, end, occupied)
+            d = dist[head]
+            part = (head, d, occupied, dist)
+        else:
+            part = (head, d, part[2], part[3])
+        new_parts.append(part)
+        total += d if d >= 0 else float("inf")
+    return total, tuple(new_parts)
+
+# 启发函数名称到函数的映射，供命令行和批量运行按名称选择
+HEURISTICS = {
+    "null": h_function_null,
+    "method1": h_function_method1,
+    "method2": h_function_method2,
+    "method2_incremental": h_function_method2_incremental,
+    "distance": h_function_distance,
+    "distance_incremental": h_function_distance_incremental,
+}
+
+# 可采纳（从不高估剩余成本）的启发函数名称，用它们搜索得到的解可证明最优
+ADMISSIBLE_HEURISTICS = {"null", "method1", "distance", "distance_incremental"}
+
+# 方向名称。Node.dirs 中每条线路占 2 位，编码 k 表示 DIRECTIONS[k]；
+# 尚未移动的线路编码为 0，是否移动过由其起点是否仍在初始位置判断（见 MatchProblem.g）
+DIRECTIONS = ("up", "down", "left", "right")
+
+def pack_directions(directions):
+    """
+    将 {线路索引: 方向} 字典压缩为整数。
+    :param directions: 方向字典，可为 None
+    :return: 压缩后的整数
+    """
+    dirs = 0
+    for line_idx, direction in (directions or {}).items():
+        if direction is not None:
+            dirs |= DIRECTIONS.index(direction) << (2 * line_idx)
+    return dirs
+
+class Node(object):
+    __slots__ = ('stored_state', 'source', 'parent', 'action', 'path_cost', 'depth', 'dirs',
+                 'h_parts')
+
+    def __init__(self, state, parent=None, action=None, path_cost=0, directions=None, depth=0,
+                 h_parts=None):
+        """
+        初始化节点对象。
+        使用 __slots__ 存储，各线路的最后方向压缩在一个整数中。
+        :param state: 当前状态
+        :param parent: 父节点
+        :param action: 导致当前状态的动作
+        :param path_cost: 从初始状态到当前状态的路径成本（f 值）
+        :param directions: 各线路的最后移动方向，压缩后的整数，也接受 {线路索引: 方向} 字典
+        :param depth: 节点的 g 值
+        :param h_parts: 增量启发函数的中间结果，供子节点复用
+        """
+        self.stored_state = state
+        self.source = None  # 状态被释放后，用于重建状态的问题对象
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
+        self.depth = path_cost
+        if isinstance(directions, int):
+            self.dirs = directions
+        else:
+            self.dirs = pack_directions(directions)
+        self.h_parts = h_parts
+        if parent:
+            self.depth = depth
+
+    @property
+    def state(self):
+        """
+        获取节点的状态。状态已被释放时，沿父节点迭代向上找到最近的保存了状态的祖先节点，
+        再依次重放其后的动作重建（不缓存），路径再长也不会递归过深。
+        :return: 当前状态
+        """
+        state = self.stored_state
+        if state is not None or self.source is None:
+            return state
+        actions = []
+        node = self
+        while node.stored_state is None and node.source is not None:
+            actions.append(node.action)
+            node = node.parent
+        state = node.stored_state
+        move = self.source.move
+        for action in reversed(actions):
+            state = move(state, action)
+        return state
+
+    def release_state(self, problem):
+        """
+        释放节点保存的状态和增量启发函数的中间结果，之后访问 state 时按需重建。
+        节点扩展后只作为子节点的父节点留在内存中，释放后只保留动作和成本。
+        关闭集合以状态本身为键，状态对象仍由它持有，节省的主要是中间结果（如距离图）。
+        :param problem: 用于重建状态的问题对象
+        """
+        if self.parent is not None:
+            self.stored_state = None
+            self.source = problem
+        self.h_parts = None
+
+    @property
+    def directions(self):
+        """
+        各线路的最后移动方向，字典格式 {线路索引: 方向}，只包含从根节点到本节点的路径上移动过的线路。
+        :return: 方向字典
+        """
+        result = {}
+        node = self
+        while node.parent is not None:
+            line_idx = node.action[0]
+            if line_idx not in result:
+                result[line_idx] = DIRECTIONS[self.last_direction(line_idx)]
+            node = node.parent
+        return result
+
+    def last_direction(self, line_idx):
+        """
+        获取指定线路的最后移动方向编码。
+        :param line_idx: 线路索引
+        :return: 方向编码 k，表示 DIRECTIONS[k]；尚未移动的线路也为 0
+        """
+        return (self.dirs >> (2 * line_idx)) & 3
+
+    def child_node(self, problem, action, next_state=None, h=None, h_parts=None):
+        """
+        根据当前节点和动作生成子节点。
+        计算新的状态、路径成本、移动方向等信息。
+        :param problem: 问题对象
+        :param action: 动作，格式为 (线路索引, 新位置)，新位置为编码后的格子
+        :param next_state: 已计算好的子状态，为 None 时调用 problem.move 计算
+        :param h: 已计算好的启发函数值，为 None 时调用 problem.h 计算
+        :param h_parts: 与 h 一起计算好的增量启发函数中间结果
+        :return: 子节点对象
+        """
+        state = self.state
+        if next_state is None:
+            next_state = problem.move(state, action)
+        line_idx, new_cell = action
+        delta = new_cell - state.heads[line_idx]
+        
+        # 计算移动方向编码（见 DIRECTIONS）
+        if delta == -problem.n:
+            current_direction = 0
+        elif delta == problem.n:
+            current_direction = 1
+        elif delta == -1:
+            current_direction = 2
+        else:
+            current_direction = 3
+        
+        # 在父节点的方向记录中替换当前线路的 2 位
+        shift = 2 * line_idx
+        new_dirs = (self.dirs & ~(3 << shift)) | (current_direction << shift)
+        
+        # 计算新路径成本，增量启发函数复用父节点的中间结果
+        new_depth = problem.g(self, action, next_state, line_idx, current_direction)
+        if h is None:
+            if problem.incremental_h:
+                h, h_parts = problem.h(next_state, self.h_parts)
+            else:
+                h = problem.h(next_state)
+        new_cost = new_depth + h
+        
+        return Node(
+            next_state, 
+            self, 
+            action, 
+            new_cost,
+            new_dirs,
+            new_depth,
+            h_parts
+        )
+
+    def path(self):
+        """
+        从当前节点回溯到初始节点的路径。
+        :return: 节点列表，从初始节点到当前节点
+        """
+        node, path_back = self, []
+        while node:
+            path_back.append(node)
+            node = node.parent
+        return list(reversed(path_back))
+
+    def __repr__(self):
+        """
+        返回节点状态的字符串表示。
+        :return: 节点状态的字符串表示
+        """
+        state = self.state
+        ans = "##########\n"
+        n = state.n
+        for i in range(n):
+            for j in range(n):
+                ans += str(state.value(i, j)) + " "
+            ans += "\n"
+        ans += "##########\n"
+        return ans
+
+    def __lt__(self, other):
+        """
+        比较两个节点的路径成本。
+        :param other: 另一个节点
+        :return: 当前节点的路径成本小于另一个节点返回 True，否则返回 False
+        """
+        return self.path_cost < other.path_cost
+
+    def __eq__(self, other):
+        """
+        比较两个节点的状态是否相等。
+        :param other: 另一个节点
+        :return: 状态相等返回 True，否则返回 False
+        """
+        return self.state == other.state
+
+class Problem(object):
+    def __init__(self, init_state=None, h_function=None, path_cost=0):
+        """
+        初始化问题对象。
+        :param init_state: 初始状态
+        :param h_function: 启发函数
+        :param path_cost: 初始路径成本
+        """
+        self.init_state = Node(init_state, path_cost=path_cost)
+        self.h = h_function
+        self.incremental_h = getattr(h_function, "incremental", False)
+        self.open_size = 0  # 搜索中最近一个节点出队后开放表的长度，由搜索生成器更新
+
+    def actions(self, state):
+        """
+        获取当前状态下的可用动作。
+        子类需要实现该方法。
+        :param state: 当前状态
+        :return: 可用动作列表
+        """
+        pass
+
+    def move(self, state, action):
+        """
+        根据动作移动到下一个状态。
+        子类需要实现该方法。
+        :param state: 当前状态
+        :param action: 动作
+        :return: 下一个状态
+        """
+        pass
+
+    def is_goal(self, state):
+        """
+        判断当前状态是否为目标状态。
+        子类需要实现该方法。
+        :param state: 当前状态
+        :return: 是目标状态返回 True，否则返回 False
+        """
+        pass
+
+    def g(self, cost, from_state, action, to_state):
+        """
+        计算从一个状态到另一个状态的路径成本。
+        子类需要实现该方法。
+        :param cost: 当前路径成本
+        :param from_state: 起始状态
+        :param action: 动作
+        :param to_state: 目标状态
+        :return: 路径成本
+        """
+        pass
+
+    def solution(self, goal):
+        """
+        获取从初始状态到目标状态的解决方案。
+        :param goal: 目标节点
+        :return: 动作列表，从初始状态到目标状态的解决方案
+        """
+        if goal.state is None:
+            return None
+        return [node.action for node in goal.path()[1:]]
+
+    def expand(self, node):
+        """
+        扩展节点，生成所有可能的子节点。
+        :param node: 当前节点
+        :return: 子节点列表
+        """
+        return [node.child_node(self, action) for action in self.actions(node.state)]
+
+    def node_key(self, node):
+        """
+        获取搜索中开放表和关闭集合使用的去重键。
+        后续成本只取决于状态时即为状态键。
+        :param node: 节点
+        :return: 去重键
+        """
+        return state_key(node.state)
+
+class MatchProblem(Problem):
+    def __init__(self, n, init_state, h_function=h_function_null, path_cost=0, mode="mode1",
+                 prune=False):
+        """
+        初始化线路匹配问题对象。
+        :param n: 网格大小
+        :param init_state: 初始状态（State），也接受旧的 [grid, lines, active_line] 列表
+        :param h_function: 启发函数，默认为 h_function_null
+        :param path_cost: 初始路径成本
+        :param mode: 搜索模式，默认为 "mode1"
+        :param prune: 是否在扩展时剪除某条未完成线路已无法到达终点的子节点
+        """
+        if isinstance(init_state, list):
+            init_state = State.from_lists(init_state)
+        super().__init__(init_state, h_function, path_cost)
+        self.n = n
+        self.mode = mode
+        self.zobrist = zobrist_tables(n, len(init_state.heads))
+        self.starts = init_state.heads  # 各线路的初始起点，起点仍在此处的线路尚未移动
+        # 预计算每个格子的相邻格子，顺序为上、下、左、右
+        self.neighbors = []
+        for cell in range(n * n):
+            row, col = divmod(cell, n)
+            near = []
+            if row > 0:
+                near.append(cell - n)
+            if row < n - 1:
+                near.append(cell + n)
+            if col > 0:
+                near.append(cell - 1)
+            if col < n - 1:
+                near.append(cell + 1)
+            self.neighbors.append(tuple(near))
+        
+        # 剪枝所需的位掩码：整个网格、第一列、最后一列，以及每个格子的相邻格子和 3×3 环
+        self.prune = prune
+        self.pruned = 0
+        self.full_mask = (1 << (n * n)) - 1
+        self.first_col = sum(1 << (row * n) for row in range(n))
+        self.last_col = self.first_col << (n - 1)
+        self.near_masks = neighbor_masks(n)
+        self.ring_links = []
+        for cell in range(n * n):
+            row, col = divmod(cell, n)
+            links = []
+            # 按上、右、下、左的顺序，相邻两个正交邻格经由它们之间的角格相连
+            sides = [(row - 1, col), (row, col + 1), (row + 1, col), (row, col - 1)]
+            for k in range(4):
+                (ar, ac), (br, bc) = sides[k], sides[(k + 1) % 4]
+                corner = (ar + br - row, ac + bc - col)
+                if all(0 <= r < n and 0 <= c < n for r, c in ((ar, ac), (br, bc), corner)):
+                    links.append((1 << (ar * n + ac)) | (1 << (br * n + bc))
+                                 | (1 << (corner[0] * n + corner[1])))
+            self.ring_links.append(tuple(links))
+
+    def expand(self, node):
+        """
+        扩展节点，生成所有可能的子节点。
+        启用剪枝时，先生成子状态并剪除死路，再为剩余的子状态计算启发函数。
+        :param node: 当前节点
+        :return: 子节点列表
+        """
+        if not self.prune:
+            return super().expand(node)
+        if node.parent is None and self.is_dead(node.state):
+            return []
+        children = []
+        for action in self.actions(node.state):
+            next_state = self.move(node.state, action)
+            if self.is_dead_after(node.state, action, next_state):
+                self.pruned += 1
+                continue
+            children.append(node.child_node(self, action, next_state))
+        return children
+
+    def node_key(self, node):
+        """
+        获取搜索中开放表和关闭集合使用的去重键。
+        mode2 的转向惩罚取决于各线路的最后方向，因此键为 (状态键, 压缩的方向编码)；
+        尚未移动的线路编码为 0，而是否移动过已由状态决定，所以键不会混淆。
+        :param node: 节点
+        :return: 去重键
+        """
+        if self.mode == "mode2":
+            return (state_key(node.state), node.dirs)
+        return state_key(node.state)
+
+    def flood(self, seeds, free, target=0):
+        """
+        在空闲格子中按位并行地做洪水填充。
+        :param seeds: 起始格子的位掩码（只保留其中的空闲格子）
+        :param free: 空闲格子的位掩码
+        :param target: 目标位掩码，填充区域与其相交时提前返回
+        :return: 填充到的区域的位掩码
+        """
+        n = self.n
+        not_first = self.full_mask & ~self.first_col
+        not_last = self.full_mask & ~self.last_col
+        region = seeds & free
+        while region and not region & target:
+            grown = (region | (region << n) | (region >> n)
+                     | ((region << 1) & not_first) | ((region >> 1) & not_last)) & free
+            if grown == region:
+                break
+            region = grown
+        return region
+
+    def line_connected(self, state, line_idx, free):
+        """
+        判断线路的起点能否经过空闲格子到达终点。
+        :param state: 当前状态
+        :param line_idx: 线路索引
+        :param free: 空闲格子的位掩码
+        :return: 能到达或已完成返回 True，否则返回 False
+        """
+        head = state.heads[line_idx]
+        end = state.ends[line_idx]
+        target = self.near_masks[end]
+        if head == end or target >> head & 1:
+            return True
+        return bool(self.flood(self.near_masks[head], free, target) & target)
+
+    def is_dead(self, state):
+        """
+        完整检查：是否存在无法到达终点的未完成线路。
+        本题不要求填满网格，因此孤立的空格子不构成死路，只检查各线路的连通性。
+        :param state: 当前状态
+        :return: 存在被隔断的线路返回 True，否则返回 False
+        """
+        free = self.full_mask & ~state.occupied
+        return not all(self.line_connected(state, i, free) for i in range(len(state.heads)))
+
+    def is_dead_after(self, state, action, next_state):
+        """
+        增量检查：父状态中所有线路均连通时，判断执行动作后是否出现死路。
+        新占据的格子 c 只会影响移动的线路，以及起点或终点与 c 相邻的线路；
+        若 c 的空闲邻格在其 3×3 环内仍然相互连通，移除 c 不会分割任何空闲区域，
+        其余线路无需检查，否则退回对所有线路的完整检查。
+        :param state: 父状态
+        :param action: 动作，格式为 (线路索引, 新位置)
+        :param next_state: 子状态
+        :return: 出现被隔断的线路返回 True，否则返回 False
+        """
+        line_idx, cell = action
+        if cell == state.ends[line_idx]:
+            return False  # 到达终点不占据新格子
+        free = self.full_mask & ~next_state.occupied
+        if not self.line_connected(next_state, line_idx, free):
+            return True
+        
+        # 空闲的正交邻格数减去经由空闲角格相连的相邻对数，即环内空闲邻格的分组数
+        # （四个正交邻格与四个角格全部空闲时结果为 0，同样只有一组）
+        near = self.near_masks[cell]
+        groups = (near & free).bit_count()
+        for link in self.ring_links[cell]:
+            if link & free == link:
+                groups -= 1
+        split = groups >= 2
+        for i, (head, end) in enumerate(zip(next_state.heads, next_state.ends)):
+            if i == line_idx or head == end:
+                continue
+            if split or near >> head & 1 or near >> end & 1:
+                if not self.line_connected(next_state, i, free):
+                    return True
+        return False
+
+    def g(self, parent_node, action, to_state, line_idx, current_direction):
+        """
+        计算从父节点通过某个动作到达新状态的路径成本。
+        :param parent_node: 父节点
+        :param action: 动作，包含线路索引和新位置
+        :param to_state: 到达的新状态
+        :param line_idx: 动作对应的线路索引
+        :param current_direction: 当前移动方向编码（见 DIRECTIONS）
+        :return: 新的路径成本
+        """
+        base_cost = 1
+        if self.mode == "mode2":
+            # 只有当该线路移动过（起点已离开初始位置）时才比较上次移动方向
+            moved = parent_node.state.heads[line_idx] != self.starts[line_idx]
+            if moved and current_direction != parent_node.last_direction(line_idx):
+                base_cost += 2  # 转向惩罚
+        return parent_node.depth + base_cost
+    
+    def is_valid(self, loc):
+        """
+        判断给定位置是否在网格内。
+        :param loc: 位置，格式为 [行, 列]
+        :return: 如果位置在网格内返回 True，否则返回 False
+        """
+        return 0 <= loc[0] < self.n and 0 <= loc[1] < self.n
+
+    def find_next_active_line(self, heads, ends, current_line):
+        """
+        找到下一个活动线路（未完成的线路）。
+        先从当前线路的下一个开始查找，若未找到则从头开始查找。
+        :param heads: 各线路当前起点
+        :param ends: 各线路终点
+        :param current_line: 当前线路的索引
+        :return: 下一个活动线路的索引，如果所有线路都已完成则返回 None
+        """
+        n = len(heads)
+        # 从current_line+1开始循环查找
+        for i in range(current_line + 1, n):
+            if heads[i] != ends[i]:
+                return i
+        # 如果后面没有，从头开始找
+        for i in range(0, current_line + 1):
+            if heads[i] != ends[i]:
+                return i
+        return None  # 所有线路已完成
+
+    def actions(self, state):
+        """
+        获取当前状态下的所有可用动作。
+        对于当前活动线路，找到其周围的有效移动位置，并生成对应的动作。
+        :param state: 当前状态
+        :return: 可用动作列表，每个动作格式为 (线路索引, 新位置)，新位置为编码后的格子
+        """
+        active_line = state.active_line
+        if active_line is None:
+            return []
+        
+        start = state.heads[active_line]
+        end = state.ends[active_line]
+        if start == end:
+            return []
+        
+        grid = state.grid
+        return [(active_line, cell) for cell in self.neighbors[start]
+                if grid[cell] == 0 or cell == end]
+
+    def move(self, state, action):
+        """
+        根据给定动作移动到下一个状态。
+        复制扁平网格并标记新位置，替换该线路的起点和占用位掩码，更新活动线路索引。
+        :param state: 当前状态
+        :param action: 动作，格式为 (线路索引, 新位置)
+        :return: 下一个状态
+        """
+        line_idx, new_cell = action
+        grid = bytearray(state.grid)
+        grid[new_cell] = line_idx + 1
+        heads = state.heads[:line_idx] + (new_cell,) + state.heads[line_idx + 1:]
+        bit = 1 << new_cell
+        masks = state.masks[:line_idx] + (state.masks[line_idx] | bit,) + state.masks[line_idx + 1:]
+        
+        # 更新active_line
+        new_active_line = self.find_next_active_line(heads, state.ends, line_idx)
+        key = self.child_key(state, line_idx, new_cell, new_active_line)
+        return State(state.n, bytes(grid), heads, state.ends, new_active_line, key,
+                     masks, state.occupied | bit)
+
+    def child_key(self, state, line_idx, new_cell, new_active_line):
+        """
+        由父状态的 Zobrist 键增量计算子状态的键。
+        子状态只多占用一个格子、移动一个起点并改变活动线路，因此更新为 O(1)。
+        :param state: 父状态
+        :param line_idx: 移动的线路索引
+        :param new_cell: 新位置（编码后的格子）
+        :param new_active_line: 子状态的活动线路索引
+        :return: 子状态的 Zobrist 键
+        """
+        cells_z, heads_z, active_z = self.zobrist
+        none_idx = len(active_z) - 1
+        old_active = state.active_line
+        key = (state.key
+               ^ heads_z[line_idx][state.heads[line_idx]]
+               ^ heads_z[line_idx][new_cell]
+               ^ active_z[none_idx if old_active is None else old_active]
+               ^ active_z[none_idx if new_active_line is None else new_active_line])
+        # 终点格子在初始状态中已被该线路占据，到达终点时占用不变
+        if new_cell != state.ends[line_idx]:
+            key ^= cells_z[line_idx][new_cell]
+        return key
+
+    def is_goal(self, state):
+        """
+        判断当前状态是否为目标状态。
+        目标状态为没有活动线路且所有线路的起点和终点相同。
+        :param state: 当前状态
+        :return: 如果是目标状态返回 True，否则返回 False
+        """
+        return state.active_line is None and state.heads == state.ends
+
+class BitboardMatchProblem(MatchProblem):
+    def __init__(self, n, init_state, h_function=h_function_null, path_cost=0, mode="mode1",
+                 prune=False):
+        """
+        初始化基于位棋盘的线路匹配问题对象。
+        与 MatchProblem 接口相同，可直接用于 search_generator，
+        但合法动作、目标判断和空格检查都通过整数位运算完成。
+        :param n: 网格大小
+        :param init_state: 初始状态（State），也接受旧的 [grid, lines, active_line] 列表
+        :param h_function: 启发函数，默认为 h_function_null
+        :param path_cost: 初始路径成本
+        :param mode: 搜索模式，默认为 "mode1"
+        :param prune: 是否在扩展时剪除某条未完成线路已无法到达终点的子节点
+        """
+        if isinstance(init_state, list):
+            init_state = State.from_lists(init_state)
+        super().__init__(n, BitState.from_state(init_state), h_function, path_cost, mode, prune)
+        self.neighbor_masks = neighbor_masks(n)
+
+    def actions(self, state):
+        """
+        获取当前状态下的所有可用动作。
+        候选格子为起点的相邻格子中未被占用的格子，以及该线路的终点。
+        :param state: 当前状态（BitState）
+        :return: 可用动作列表，每个动作格式为 (线路索引, 新位置)，新位置为编码后的格子
+        """
+        active_line = state.active_line
+        if active_line is None:
+            return []
+        start = state.heads[active_line]
+        end = state.ends[active_line]
+        if start == end:
+            return []
+        
+        free = self.neighbor_masks[start] & (~state.occupied | (1 << end))
+        moves = []
+        while free:
+            low = free & -free
+            moves.append((active_line, low.bit_length() - 1))
+            free ^= low
+        return moves
+
+    def move(self, state, action):
+        """
+        根据给定动作移动到下一个状态。
+        只需在该线路的位掩码和合并位掩码中置位新格子，并替换该线路的起点。
+        :param state: 当前状态（BitState）
+        :param action: 动作，格式为 (线路索引, 新位置)
+        :return: 下一个状态（BitState）
+        """
+        line_idx, new_cell = action
+        bit = 1 << new_cell
+        masks = state.masks[:line_idx] + (state.masks[line_idx] | bit,) + state.masks[line_idx + 1:]
+        heads = state.heads[:line_idx] + (new_cell,) + state.heads[line_idx + 1:]
+        pending = state.pending
+        if new_cell == state.ends[line_idx]:
+            pending &= ~(1 << line_idx)
+        
+        # 在未完成线路位掩码中循环查找下一个活动线路
+        if not pending:
+            new_active_line = None
+        else:
+            higher = pending >> (line_idx + 1)
+            if higher:
+                new_active_line = line_idx + (higher & -higher).bit_length()
+            else:
+                new_active_line = (pending & -pending).bit_length() - 1
+        key = self.child_key(state, line_idx, new_cell, new_active_line)
+        return BitState(state.n, masks, state.occupied | bit, pending,
+                        heads, state.ends, new_active_line, key)
+
+    def is_goal(self, state):
+        """
+        判断当前状态是否为目标状态，即没有未完成的线路。
+        :param state: 当前状态（BitState）
+        :return: 如果是目标状态返回 True，否则返回 False
+        """
+        return state.pending == 0
+
+class SearchStats(object):
+    # 计时的搜索阶段
+    PHASES = ("open", "closed", "expand", "move", "heuristic", "goal")
+
+    def __init__(self, callback=None, interval=1000):
+        """
+        初始化搜索统计信息。
+        传给 search_generator 后，在搜索过程中累计各项计数和各阶段耗时；
+        不传时 search_generator 走无插桩的路径，没有任何额外开销。
+        :param callback: 可选的回调函数，每扩展 interval 个节点以本对象为参数调用一次
+        :param interval: 回调间隔（扩展节点数）
+        """
+        self.expanded = 0  # 扩展（出队）的节点数
+        self.generated = 0  # 生成的子节点数
+        self.duplicates = 0  # 因状态已在关闭集合或开放表中而丢弃的子节点数
+        self.reopened = 0  # 开放表中已有状态被更低成本路径替换的次数
+        self.heuristic_calls = 0  # 启发函数调用次数
+        self.open_peak = 0  # 开放表的最大长度
+        self.closed_peak = 0  # 关闭集合的最大长度
+        self.closed_bytes = 0  # 关闭集合估算占用的内存（字节），见 Set.memory_usage
+        self.open_size = 0  # 最近一个节点出队后开放表的长度
+        self.beam_failures = 0  # 束搜索中束被截断后变空、丢失解的次数
+        self.times = dict.fromkeys(self.PHASES, 0.0)  # 各阶段累计耗时（秒）
+        self.callback = callback
+        self.interval = interval
+
+    def as_dict(self):
+        """
+        以字典形式返回统计信息，便于序列化。各阶段耗时以 time_<阶段> 为键。
+        :return: 统计信息字典
+        """
+        result = {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "reopened": self.reopened,
+            "heuristic_calls": self.heuristic_calls,
+            "open_peak": self.open_peak,
+            "closed_peak": self.closed_peak,
+            "closed_bytes": self.closed_bytes,
+            "beam_failures": self.beam_failures,
+        }
+        for phase, seconds in self.times.items():
+            result["time_" + phase] = seconds
+        return result
+
+    def summary(self):
+        """
+        生成便于阅读的统计摘要。
+        :return: 多行文本
+        """
+        lines = [
+            f"Expanded: {self.expanded}  Generated: {self.generated}",
+            f"Duplicates: {self.duplicates}  Reopened: {self.reopened}",
+            f"Heuristic calls: {self.heuristic_calls}",
+            f"Open peak: {self.open_peak}  Closed peak: {self.closed_peak}",
+        ]
+        if self.closed_bytes:
+            lines.append(f"Closed memory: {self.closed_bytes / 1024:.1f} KiB")
+        if self.beam_failures:
+            lines.append(f"Beam failures: {self.beam_failures}")
+        for phase, seconds in self.times.items():
+            lines.append(f"{phase:>9}: {seconds:.3f}s")
+        return "\n".join(lines)
+
+def search_generator(problem, stats=None, tie_break=None, release_states=False):
+    """
+    搜索生成器函数，使用优先队列进行搜索。
+    从初始状态开始，不断扩展节点，直到找到目标状态或队列为空。
+    :param problem: 问题对象
+    :param stats: 可选的 SearchStats 对象，给出时改用 profiled_search_generator 记录统计信息
+    :param tie_break: 路径成本相同时的裁决函数，见 PriorityQueue，默认按插入顺序
+    :param release_states: 是否在节点扩展后释放其状态（见 Node.release_state），以时间换内存
+    :yield: 生成搜索过程中的节点
+    """
+    if stats is not None:
+        yield from profiled_search_generator(problem, stats, tie_break, release_states)
+        return
+
+    node_key = problem.node_key
+    infinity = float("inf")
+    openPQ = PriorityQueue(problem.init_state, key=node_key, tie_break=tie_break)
+    closed = Set()
+
+    while not openPQ.empty():
+        current = openPQ.pop()
+        problem.open_size = len(openPQ)
+        yield current
+
+        if problem.is_goal(current.state):
+            yield current
+            break
+
+        closed.add(node_key(current))
+        for child in problem.expand(current):
+            if child.path_cost == infinity:
+                continue  # 启发函数为无穷大，某条线路已无法到达终点
+            key = node_key(child)
+            idx = openPQ.find(child, key)
+            if not (closed.include(key) or idx != -1):
+                openPQ.push(child, key)
+            elif idx != -1 and child.path_cost < openPQ.elements[idx].path_cost:
+                openPQ.compare_and_replace(idx, child)
+        if release_states:
+            current.release_state(problem)
+    yield None
+
+def profiled_search_generator(problem, stats, tie_break=None, release_states=False):
+    """
+    带插桩的搜索生成器，搜索顺序与 search_generator 完全相同。
+    记录扩展、生成、重复、替换次数和开放表、关闭集合的峰值，
+    并分别累计开放表、关闭集合、扩展、状态转移、启发函数和目标判断的耗时。
+    扩展由本函数逐步完成（与 problem.expand 等价，不修改 problem），各阶段的耗时互不包含：
+    expand 只包括生成动作、剪除死路和构造子节点，不含其中的 move 与启发函数。
+    生成器暂停（调用方处理节点）期间的时间不计入。
+    :param problem: 问题对象
+    :param stats: SearchStats 对象
+    :param tie_break: 路径成本相同时的裁决函数
+    :param release_states: 是否在节点扩展后释放其状态
+    :yield: 生成搜索过程中的节点
+    """
+    clock = time.perf_counter
+    times = stats.times
+    h_function = problem.h
+    move = problem.move
+    incremental_h = problem.incremental_h
+    prune = getattr(problem, "prune", False)
+    node_key = problem.node_key
+    infinity = float("inf")
+
+    def expand(node):
+        # 与 problem.expand 相同，分别计时 move、启发函数和其余部分
+        start = clock()
+        state = node.state
+        children = []
+        if prune and node.parent is None and problem.is_dead(state):
+            times["expand"] += clock() - start
+            return children
+        actions = problem.actions(state)
+        for action in actions:
+            middle = clock()
+            times["expand"] += middle - start
+            next_state = move(state, action)
+            start = clock()
+            times["move"] += start - middle
+            if prune and problem.is_dead_after(state, action, next_state):
+                problem.pruned += 1
+                continue
+            middle = clock()
+            times["expand"] += middle - start
+            h_parts = None
+            if incremental_h:
+                h, h_parts = h_function(next_state, node.h_parts)
+            else:
+                h = h_function(next_state)
+            start = clock()
+            times["heuristic"] += start - middle
+            stats.heuristic_calls += 1
+            children.append(node.child_node(problem, action, next_state, h, h_parts))
+        times["expand"] += clock() - start
+        return children
+
+    openPQ = PriorityQueue(problem.init_state, key=node_key, tie_break=tie_break)
+    closed = Set(measure=True)
+
+    while True:
+        start = clock()
+        if openPQ.empty():
+            times["open"] += clock() - start
+            break
+        current = openPQ.pop()
+        times["open"] += clock() - start
+        stats.expanded += 1
+        stats.open_size = problem.open_size = len(openPQ)
+        if stats.callback is not None and stats.expanded % stats.interval == 0:
+            stats.callback(stats)
+        yield current
+
+        start = clock()
+        is_goal = problem.is_goal(current.state)
+        times["goal"] += clock() - start
+        if is_goal:
+            yield current
+            break
+
+        start = clock()
+        closed.add(node_key(current))
+        times["closed"] += clock() - start
+
+        children = expand(current)
+        stats.generated += len(children)
+
+        for child in children:
+            if child.path_cost == infinity:
+                continue  # 启发函数为无穷大，某条线路已无法到达终点
+            start = clock()
+            key = node_key(child)
+            idx = openPQ.find(child, key)
+            middle = clock()
+            in_closed = closed.include(key)
+            end = clock()
+            times["closed"] += end - middle
+            if not (in_closed or idx != -1):
+                openPQ.push(child, key)
+            elif idx != -1 and child.path_cost < openPQ.elements[idx].path_cost:
+                openPQ.compare_and_replace(idx, child)
+                stats.reopened += 1
+            else:
+                stats.duplicates += 1
+            times["open"] += (middle - start) + (clock() - end)
+        if release_states:
+            current.release_state(problem)
+
+        stats.open_peak = max(stats.open_peak, len(openPQ))
+        stats.closed_peak = max(stats.closed_peak, len(closed))
+        stats.closed_bytes = closed.memory_usage()
+    if stats.callback is not None:
+        stats.callback(stats)
+    yield None
+
+def ida_search_generator(problem, table_size=None, stats=None):
+    """
+    迭代加深 A*（IDA*）搜索生成器，与 search_generator 的生成协议相同。
+    每轮以 f 值阈值做深度优先搜索，超过阈值的节点只用于确定下一轮的阈值，
+    内存只与搜索深度和分支数成正比。启发函数可采纳时得到的解最优。
+    可选的置换表记录本轮中各状态被扩展时的 g 值，以不更小的 g 值再次到达时剪枝；
+    置换表每轮清空，且最多保存 table_size 个状态。
+    置换表的键为 problem.node_key，mode2 中同时包含各线路的最后方向。
+    :param problem: 问题对象
+    :param table_size: 置换表容量，为 None 时不使用置换表
+    :param stats: 可选的 SearchStats 对象，记录扩展、生成、剪枝次数和最大栈深度、置换表大小
+    :yield: 生成搜索过程中的节点，找到目标时连续生成两次目标节点，最后生成 None
+    """
+    root = problem.init_state
+    threshold = root.path_cost
+    infinity = float("inf")
+    while True:
+        next_threshold = infinity
+        table = {} if table_size else None
+        stack = [iter((root,))]  # 每层为尚未访问的子节点迭代器
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            if node.path_cost > threshold:
+                next_threshold = min(next_threshold, node.path_cost)
+                continue
+            if table is not None:
+                key = problem.node_key(node)
+                seen = table.get(key)
+                if seen is not None and seen <= node.depth:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                if seen is not None or len(table) < table_size:
+                    table[key] = node.depth
+            if stats is not None:
+                stats.expanded += 1
+                if stats.callback is not None and stats.expanded % stats.interval == 0:
+                    stats.callback(stats)
+            yield node
+            
+            if problem.is_goal(node.state):
+                yield node
+                yield None
+                return
+            
+            # 按 f 值从小到大访问子节点，尽早找到目标；f 值为无穷大的子节点不可能到达目标
+            children = sorted((child for child in problem.expand(node)
+                               if child.path_cost != infinity), key=lambda child: child.path_cost)
+            stack.append(iter(children))
+            if stats is not None:
+                stats.generated += len(children)
+                stats.open_peak = max(stats.open_peak, len(stack))
+                if table is not None:
+                    stats.closed_peak = max(stats.closed_peak, len(table))
+        if next_threshold == infinity:
+            break  # 没有被阈值截断的节点，搜索空间已穷尽
+        threshold = next_threshold
+    yield None
+
+def beam_search_generator(problem, width=100, max_width=None, stats=None):
+    """
+    束搜索生成器，与 search_generator 的生成协议相同。
+    按步数逐层扩展，每层只保留 f 值最小的 width 个节点，时间和内存为 O(width × 深度)，不保证最优。
+    每一步恰好占用一个格子，不同层的状态必然不同，因此只需在层内按 problem.node_key 去重。
+    某一层被截断过而后来的层变空时，称为束丢失了解：给出 max_width 时束宽加倍后重新搜索，
+    直到找到解或束宽超过 max_width；从未截断而变空时搜索已穷尽，问题确实无解。
+    :param problem: 问题对象
+    :param width: 束宽，即每层保留的节点数
+    :param max_width: 丢失解后允许加倍到的最大束宽，为 None 时不重新搜索
+    :param stats: 可选的 SearchStats 对象，记录扩展、生成、重复次数、最大层宽和丢失解的次数
+    :yield: 生成搜索过程中的节点，找到目标时连续生成两次目标节点，最后生成 None
+    """
+    infinity = float("inf")
+    while True:
+        layer = [problem.init_state]
+        truncated = False
+        while layer:
+            candidates = {}  # 去重键 -> 本层 f 值最小的子节点
+            for node in layer:
+                if stats is not None:
+                    stats.expanded += 1
+                    if stats.callback is not None and stats.expanded % stats.interval == 0:
+                        stats.callback(stats)
+                yield node
+
+                if problem.is_goal(node.state):
+                    yield node
+                    yield None
+                    return
+
+                children = problem.expand(node)
+                if stats is not None:
+                    stats.generated += len(children)
+                for child in children:
+                    if child.path_cost == infinity:
+                        continue  # 某条线路已无法到达终点
+                    key = problem.node_key(child)
+                    other = candidates.get(key)
+                    if other is None or child.path_cost < other.path_cost:
+                        candidates[key] = child
+                    if other is not None and stats is not None:
+                        stats.duplicates += 1
+
+            if len(candidates) > width:
+                truncated = True
+                layer = heapq.nsmallest(width, candidates.values(), key=lambda child: child.path_cost)
+            else:
+                layer = sorted(candidates.values(), key=lambda child: child.path_cost)
+            if stats is not None:
+                stats.open_peak = max(stats.open_peak, len(layer))
+
+        if not truncated:
+            break  # 没有被截断的层，搜索空间已穷尽
+        if stats is not None:
+            stats.beam_failures += 1
+        if max_width is None or width >= max_width:
+            break
+        width = min(width * 2, max_width)
+    yield None
+
+def anytime_search_generator(problem, weight=3.0, weight_step=0.5, time_limit=None, stats=None):
+    """
+    随时（anytime）加权 A* 搜索生成器，不断给出更好的解。
+    开放表按 g + weight × h 排序，可以很快找到第一个解；此后每找到更好的解，
+    权重减小 weight_step（不低于 1）并重新排序开放表，f = g + h 不小于当前解成本的节点被剪除，
+    已扩展的状态以更小的 g 值再次到达时重新打开。开放表为空时当前解即为最优。
+    每次生成的界限为 当前解成本 / 开放表中最小的 f 值，启发函数可采纳时最优成本不小于 当前解成本 / 界限。
+    :param problem: 问题对象
+    :param weight: 初始启发函数权重
+    :param weight_step: 每找到一个更好的解后权重的减小量
+    :param time_limit: 可选的时间限制（秒），超时后停止生成
+    :param stats: 可选的 SearchStats 对象，记录扩展、生成、重新打开次数和开放表、关闭集合的峰值
+    :yield: (目标节点, 次优界限) 元组，界限为 1.0 时已证明最优
+    """
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    current_weight = weight
+
+    def weighted_cost(node):
+        return node.depth + current_weight * (node.path_cost - node.depth)
+
+    openPQ = PriorityQueue(problem.init_state, key=problem.node_key, cost=weighted_cost)
+    closed = {}  # 去重键 -> 扩展时的 g 值
+    incumbent = None
+    upper = float("inf")
+    bound = float("inf")
+    if problem.is_goal(problem.init_state.state):
+        yield problem.init_state, 1.0
+        return
+
+    while not openPQ.empty():
+        if deadline is not None and time.perf_counter() > deadline:
+            return
+        node = openPQ.pop()
+        if node.path_cost >= upper:
+            continue
+        closed[problem.node_key(node)] = node.depth
+        children = problem.expand(node)
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(children)
+
+        improved = False
+        for child in children:
+            if child.path_cost >= upper:
+                continue
+            if problem.is_goal(child.state):
+                incumbent, upper, improved = child, child.depth, True
+                continue
+            key = problem.node_key(child)
+            closed_g = closed.get(key)
+            if closed_g is not None:
+                if child.depth >= closed_g:
+                    continue
+                del closed[key]  # 找到更短路径，重新打开
+                if stats is not None:
+                    stats.reopened += 1
+            openPQ.push(child, key)
+        if stats is not None:
+            stats.open_peak = max(stats.open_peak, len(openPQ))
+            stats.closed_peak = max(stats.closed_peak, len(closed))
+
+        if improved:
+            # 降低权重，剪除不可能改进当前解的节点，并按新权重重建开放表
+            current_weight = max(1.0, current_weight - weight_step)
+            remaining = [item for item in openPQ.elements if item.path_cost < upper]
+            openPQ = PriorityQueue(key=problem.node_key, cost=weighted_cost)
+            for item in remaining:
+                openPQ.push(item)
+            lower = min([upper] + [item.path_cost for item in remaining])
+            bound = upper / lower if lower > 0 else float("inf")
+            yield incumbent, bound
+
+    if incumbent is not None and bound > 1.0:
+        yield incumbent, 1.0
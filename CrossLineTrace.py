@@ -0,0 +1,215 @@
+import mmap
+import struct
+from array import array
+
+from CrossLineSolver import MatchProblem, State, search_generator
+
+# 轨迹文件头：魔数、版本、网格大小、线路数、模式编号、关键帧间隔、步数、关键帧区偏移量
+HEADER = struct.Struct("<4sHHHBxIQQ")
+MAGIC = b"CLTR"
+VERSION = 1
+MODES = ("mode1", "mode2")
+
+# 每步记录：父节点步号（根节点为 -1）、动作线路、动作格子、g、h、出队后开放表长度
+RECORD = struct.Struct("<iHIffI")
+NO_LINE = 0xFFFF  # 根节点没有动作
+NO_CELL = 0xFFFFFFFF
+
+# 关键帧头：步号、活动线路（-1 表示无），其后为各线路起点和网格
+KEYFRAME = struct.Struct("<Ii")
+
+class TraceWriter(object):
+    def __init__(self, path, problem, keyframe_interval=8):
+        """
+        创建轨迹文件并写入文件头和初始线路。
+        每个出队节点写入一条定长记录，可按步号直接定位；
+        移动步数为 keyframe_interval 整数倍的节点另存完整状态作为关键帧，
+        回放时从任意一步沿父节点最多回溯 keyframe_interval 步即可找到关键帧。
+        :param path: 轨迹文件路径
+        :param problem: 问题对象（MatchProblem）
+        :param keyframe_interval: 关键帧间隔（移动步数）
+        """
+        state = problem.init_state.state
+        self.n = state.n
+        self.m = len(state.heads)
+        self.mode = problem.mode
+        self.keyframe_interval = keyframe_interval
+        self.cells = struct.Struct(f"<{self.m}I")
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.n, self.m, MODES.index(self.mode),
+                                    keyframe_interval, 0, 0))
+        self.file.write(self.cells.pack(*state.heads))
+        self.file.write(self.cells.pack(*state.ends))
+        self.steps = 0
+        self.ids = {}  # id(节点) -> 步号；父节点在子节点之前出队，且仍被子节点引用
+        self.moves = array("I")  # 每一步节点距根节点的移动步数
+        self.keyframes = []  # 关键帧数据，关闭时写在记录之后
+
+    def add(self, node, open_size=0):
+        """
+        记录一个出队的节点。
+        :param node: 节点
+        :param open_size: 该节点出队后开放表的长度
+        """
+        step = self.steps
+        parent = self.ids.get(id(node.parent), -1) if node.parent is not None else -1
+        if parent < 0:
+            line_idx, cell, moves = NO_LINE, NO_CELL, 0
+        else:
+            line_idx, cell = node.action
+            moves = self.moves[parent] + 1
+        self.file.write(RECORD.pack(parent, line_idx, cell, node.depth,
+                                    node.path_cost - node.depth, open_size))
+        self.ids[id(node)] = step
+        self.moves.append(moves)
+        if moves % self.keyframe_interval == 0:
+            state = node.state
+            active_line = state.active_line if state.active_line is not None else -1
+            self.keyframes.append(KEYFRAME.pack(step, active_line)
+                                  + self.cells.pack(*state.heads) + state.grid)
+        self.steps += 1
+
+    def close(self):
+        """
+        写入关键帧，并在文件头中补写步数和关键帧区偏移量。
+        """
+        keyframe_offset = self.file.tell()
+        for keyframe in self.keyframes:
+            self.file.write(keyframe)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.n, self.m, MODES.index(self.mode),
+                                    self.keyframe_interval, self.steps, keyframe_offset))
+        self.file.close()
+
+def record_search(problem, path, stats=None, tie_break=None, keyframe_interval=8):
+    """
+    运行 search_generator 并把每个出队节点记录到轨迹文件，生成的节点与 search_generator 相同。
+    目标节点会被连续生成两次，只记录一次。搜索被中途停止时文件同样完整。
+    每条记录的开放表长度取自搜索生成器在节点出队后更新的 problem.open_size。
+    :param problem: 问题对象（MatchProblem）
+    :param path: 轨迹文件路径
+    :param stats: 可选的 SearchStats 对象
+    :param tie_break: 路径成本相同时的裁决函数
+    :param keyframe_interval: 关键帧间隔（移动步数）
+    :yield: 生成搜索过程中的节点
+    """
+    writer = TraceWriter(path, problem, keyframe_interval)
+    last = None
+    try:
+        for node in search_generator(problem, stats, tie_break):
+            if node is not None and node is not last:
+                writer.add(node, problem.open_size)
+                last = node
+            yield node
+    finally:
+        writer.close()
+
+class TraceReader(object):
+    def __init__(self, path):
+        """
+        以内存映射方式打开轨迹文件。
+        文件头中的关键帧区偏移量为 0 时（录制未正常结束），按文件大小推算步数，此时没有关键帧。
+        :param path: 轨迹文件路径
+        """
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, m, mode, keyframe_interval, steps, keyframe_offset = \
+            HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a search trace")
+        self.n = n
+        self.m = m
+        self.mode = MODES[mode]
+        self.keyframe_interval = keyframe_interval
+        self.cells = struct.Struct(f"<{m}I")
+        heads = self.cells.unpack_from(self.data, HEADER.size)
+        ends = self.cells.unpack_from(self.data, HEADER.size + self.cells.size)
+        self.ends = ends
+        lines = [[list(divmod(head, n)), list(divmod(end, n))] for head, end in zip(heads, ends)]
+        self.problem = MatchProblem(n, State.initial(n, lines), mode=self.mode)
+        self.records_offset = HEADER.size + 2 * self.cells.size
+        if keyframe_offset == 0:
+            steps = (len(self.data) - self.records_offset) // RECORD.size
+        self.steps = steps
+
+        # 关键帧索引：步号 -> 偏移量
+        self.keyframe_size = KEYFRAME.size + self.cells.size + n * n
+        self.keyframes = {}
+        if keyframe_offset:
+            for pos in range(keyframe_offset, len(self.data), self.keyframe_size):
+                self.keyframes[KEYFRAME.unpack_from(self.data, pos)[0]] = pos
+        self.cache = {}  # 最近重建的状态：步号 -> 状态
+
+    def __len__(self):
+        """
+        返回记录的步数。
+        :return: 步数
+        """
+        return self.steps
+
+    def record(self, step):
+        """
+        读取一步的记录。
+        :param step: 步号（从 0 开始）
+        :return: 记录字典，包含 step、parent、action（根节点为 None）、g、h、f 和 open_size
+        """
+        parent, line_idx, cell, g, h, open_size = RECORD.unpack_from(
+            self.data, self.records_offset + step * RECORD.size)
+        return {
+            "step": step,
+            "parent": parent,
+            "action": (line_idx, cell) if parent >= 0 else None,
+            "g": g,
+            "h": h,
+            "f": g + h,
+            "open_size": open_size,
+        }
+
+    def keyframe(self, step):
+        """
+        读取一个关键帧中保存的状态。
+        :param step: 关键帧的步号
+        :return: 状态
+        """
+        pos = self.keyframes[step]
+        _, active_line = KEYFRAME.unpack_from(self.data, pos)
+        pos += KEYFRAME.size
+        heads = self.cells.unpack_from(self.data, pos)
+        grid = self.data[pos + self.cells.size:pos + self.cells.size + self.n * self.n]
+        return State(self.n, grid, heads, self.ends, active_line if active_line >= 0 else None)
+
+    def state(self, step):
+        """
+        重建任意一步的状态：沿父节点回溯到最近的关键帧（或根节点），再依次应用其后的动作。
+        回溯步数不超过关键帧间隔，与搜索规模无关。
+        :param step: 步号（从 0 开始）
+        :return: 状态
+        """
+        state = self.cache.get(step)
+        if state is not None:
+            return state
+        actions = []
+        current = step
+        while current not in self.keyframes:
+            parent, line_idx, cell = RECORD.unpack_from(
+                self.data, self.records_offset + current * RECORD.size)[:3]
+            if parent < 0:
+                state = self.problem.init_state.state
+                break
+            actions.append((line_idx, cell))
+            current = parent
+        else:
+            state = self.keyframe(current)
+        for action in reversed(actions):
+            state = self.problem.move(state, action)
+        if len(self.cache) >= 256:
+            self.cache.clear()
+        self.cache[step] = state
+        return state
+
+    def close(self):
+        """
+        关闭内存映射。
+        """
+        self.data.close()
@@ -0,0 +1,198 @@
+import random
+
+import pytest
+
+from CrossLineBatch import batch_h_method2, batch_search_generator
+from CrossLineCLI import build_problem, solve_instance
+from CrossLineParallel import hda_star
+from CrossLinePortfolio import solve_portfolio
+from CrossLineSolver import (
+    anytime_search_generator, beam_search_generator, h_function_method2, ida_search_generator,
+    search_generator,
+)
+
+MODES = ("mode1", "mode2")
+
+def seeded_instances(seed=2024, count=8):
+    """
+    生成固定种子的小实例（坐标从 1 开始），其中既有有解的也有无解的。
+    :param seed: 随机种子
+    :param count: 实例数量
+    :return: 实例字典列表
+    """
+    rng = random.Random(seed)
+    instances = []
+    for index in range(count):
+        n = rng.choice((4, 5))
+        m = rng.choice((2, 3))
+        cells = rng.sample(range(n * n), 2 * m)
+        pairs = [[[cells[2 * i] // n + 1, cells[2 * i] % n + 1],
+                  [cells[2 * i + 1] // n + 1, cells[2 * i + 1] % n + 1]] for i in range(m)]
+        instances.append({"id": f"seeded-{index}", "n": n, "pairs": pairs})
+    return instances
+
+INSTANCES = seeded_instances()
+
+def goal_cost(problem, nodes):
+    """
+    运行一个遵循 search_generator 生成协议的搜索，返回第一个目标节点的成本。
+    :param problem: 问题对象
+    :param nodes: 搜索生成器
+    :return: 目标成本，无解时返回 None
+    """
+    for node in nodes:
+        if node is None:
+            return None
+        if problem.is_goal(node.state):
+            return node.depth
+    return None
+
+def astar_cost(instance, mode, heuristic="method1"):
+    """
+    用普通 A* 求出最优成本，作为其他搜索和引擎的参照。
+    """
+    problem = build_problem(dict(instance, mode=mode), heuristic)
+    return goal_cost(problem, search_generator(problem))
+
+@pytest.fixture(scope="module")
+def reference():
+    """
+    各实例在两种模式下的 A* 最优成本，键为 (实例 id, 模式)。
+    """
+    costs = {(instance["id"], mode): astar_cost(instance, mode)
+             for instance in INSTANCES for mode in MODES}
+    # 种子实例应同时覆盖有解和无解的情况
+    assert any(cost is None for cost in costs.values())
+    assert any(cost is not None for cost in costs.values())
+    return costs
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("heuristic", ["null", "distance", "distance_incremental"])
+def test_heuristics_match_astar(reference, mode, heuristic):
+    for instance in INSTANCES:
+        assert astar_cost(instance, mode, heuristic) == reference[instance["id"], mode]
+
+def expansion_order(instance, mode, heuristic):
+    """
+    返回普通 A* 依次出队的节点的 (f, g) 序列。
+    """
+    problem = build_problem(dict(instance, mode=mode), heuristic)
+    order = []
+    for node in search_generator(problem):
+        if node is None:
+            break
+        order.append((node.path_cost, node.depth))
+    return order
+
+@pytest.mark.parametrize("mode", MODES)
+def test_method2_incremental_matches_method2(mode):
+    """
+    method2 在 mode1 中不可采纳，只与其自身的结果比较：增量版本的值完全相同，出队顺序也相同。
+    """
+    for instance in INSTANCES:
+        assert (expansion_order(instance, mode, "method2_incremental") ==
+                expansion_order(instance, mode, "method2"))
+
+@pytest.mark.parametrize("mode", MODES)
+def test_bitboard_engine_matches_astar(reference, mode):
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1", "bitboard")
+        assert goal_cost(problem, search_generator(problem)) == reference[instance["id"], mode]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_pruned_search_matches_astar(reference, mode):
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1", prune=True)
+        assert goal_cost(problem, search_generator(problem)) == reference[instance["id"], mode]
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("table_size", [None, 64])
+def test_ida_matches_astar(reference, mode, table_size):
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1")
+        nodes = ida_search_generator(problem, table_size)
+        assert goal_cost(problem, nodes) == reference[instance["id"], mode]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_beam_matches_astar(reference, mode):
+    """
+    束宽足够大时束搜索不会截断：mode1 中成本等于步数，第一个目标即最优；
+    mode2 中有转向惩罚，只要求找到的解不优于最优解，且有解与否一致。
+    """
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1")
+        cost = goal_cost(problem, beam_search_generator(problem, width=10 ** 6))
+        expected = reference[instance["id"], mode]
+        if mode == "mode1" or expected is None:
+            assert cost == expected
+        else:
+            assert cost is not None and cost >= expected
+
+@pytest.mark.parametrize("mode", MODES)
+def test_anytime_matches_astar(reference, mode):
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1")
+        results = list(anytime_search_generator(problem, weight=3.0))
+        expected = reference[instance["id"], mode]
+        if expected is None:
+            assert results == []
+            continue
+        goal, bound = results[-1]
+        assert goal.depth == expected
+        assert bound == 1.0
+        costs = [goal.depth for goal, _ in results]
+        assert costs == sorted(costs, reverse=True)
+
+@pytest.mark.parametrize("mode", MODES)
+def test_batch_engine_matches_astar(reference, mode):
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1")
+        nodes = batch_search_generator(problem, batch_size=8)
+        assert goal_cost(problem, nodes) == reference[instance["id"], mode]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_cli_batch_search_matches_astar(reference, mode):
+    for instance in INSTANCES:
+        result = solve_instance(dict(instance, mode=mode), search="batch", batch_size=8,
+                                profile=True)
+        assert result["cost"] == reference[instance["id"], mode]
+        assert result["stats"]["expanded"] > 0
+
+@pytest.mark.parametrize("mode", MODES)
+def test_batch_method2_matches_scalar(mode):
+    """
+    method2 不可采纳，只与其自身的结果比较：批量计算的值与逐个计算的值相同。
+    """
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method2")
+        for node in search_generator(problem):
+            if node is None or problem.is_goal(node.state):
+                break
+            states = [problem.move(node.state, action) for action in problem.actions(node.state)]
+            if states:
+                assert batch_h_method2(states).tolist() == [h_function_method2(state)
+                                                            for state in states]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_pruned_batch_engine_matches_astar(reference, mode):
+    for instance in INSTANCES:
+        problem = build_problem(dict(instance, mode=mode), "method1", prune=True)
+        nodes = batch_search_generator(problem, batch_size=8)
+        assert goal_cost(problem, nodes) == reference[instance["id"], mode]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_hda_star_matches_astar(reference, mode):
+    for instance in INSTANCES[:4]:
+        outcome = hda_star(dict(instance, mode=mode), "method1", workers=2, batch_size=8)
+        assert outcome["cost"] == reference[instance["id"], mode]
+        assert outcome["solved"] == (outcome["cost"] is not None)
+
+@pytest.mark.parametrize("mode", MODES)
+def test_portfolio_matches_astar(reference, mode):
+    """
+    依次求解多个实例：胜出的配置提前返回后，其余工作进程必须被终止并回收，下一个实例才不会卡住。
+    """
+    for instance in INSTANCES:
+        outcome = solve_portfolio(dict(instance, mode=mode), workers=3)
+        assert outcome["proven"]
+        assert outcome["cost"] == reference[instance["id"], mode]
@@ -0,0 +1,141 @@
+import pytest
+
+from CrossLineCLI import build_problem
+from CrossLineProcess import COUNTERS, FrameChannel
+from CrossLineSolver import SearchStats, search_generator
+from CrossLineTrace import TraceReader, TraceWriter, record_search
+
+INSTANCE = {"n": 5, "pairs": [[[1, 1], [3, 5]], [[1, 5], [2, 2]], [[5, 1], [5, 5]]]}
+
+def expanded_nodes(problem, open_sizes=None):
+    """
+    运行 A* 并返回依次出队的节点（目标节点只出现一次）。
+    :param open_sizes: 可选的列表，依次追加每个节点出队后的开放表长度
+    """
+    nodes = []
+    for node in search_generator(problem):
+        if node is None:
+            break
+        if nodes and node is nodes[-1]:
+            continue
+        nodes.append(node)
+        if open_sizes is not None:
+            open_sizes.append(problem.open_size)
+    return nodes
+
+@pytest.fixture
+def channel():
+    """
+    新建一个帧缓冲区，测试结束后释放共享内存。
+    """
+    channel = FrameChannel(5, 3, slots=4)
+    yield channel
+    channel.close()
+    channel.unlink()
+
+def test_frame_channel_round_trip(channel):
+    problem = build_problem(dict(INSTANCE, mode="mode2"), "method1")
+    node = expanded_nodes(problem)[-1]
+    stats = SearchStats()
+    for value, name in enumerate(COUNTERS, 1):
+        setattr(stats, name, value)
+    for value, phase in enumerate(SearchStats.PHASES, 1):
+        stats.times[phase] = value / 4
+
+    reader = FrameChannel(5, 3, slots=4, name=channel.name)
+    try:
+        assert reader.read() is None
+        channel.write(42, node, stats, done=True)
+        frame = reader.read()
+    finally:
+        reader.close()
+
+    assert frame["step"] == 42
+    assert frame["path_cost"] == node.path_cost
+    assert frame["depth"] == node.depth
+    assert frame["done"] is True
+    assert frame["active_line"] == node.state.active_line
+    assert frame["heads"] == node.state.heads
+    assert frame["grid"] == node.state.grid
+    for name in COUNTERS:
+        assert getattr(frame["stats"], name) == getattr(stats, name)
+    assert frame["stats"].times == stats.times
+
+def test_frame_channel_returns_latest_frame(channel):
+    problem = build_problem(dict(INSTANCE, mode="mode1"), "method1")
+    nodes = expanded_nodes(problem)
+    # 写入的帧数超过槽位数，旧帧被覆盖后仍读到最新一帧
+    for step, node in enumerate(nodes[:10], 1):
+        channel.write(step, node)
+    frame = channel.read()
+    assert frame["step"] == 10
+    assert frame["heads"] == nodes[9].state.heads
+    assert frame["stats"] is None
+    assert frame["done"] is False
+
+    channel.write(11, None, done=True)
+    frame = channel.read()
+    assert frame["heads"] is None
+    assert frame["active_line"] is None
+    assert frame["done"] is True
+
+@pytest.mark.parametrize("mode", ["mode1", "mode2"])
+@pytest.mark.parametrize("profile", [False, True])
+def test_trace_round_trip(tmp_path, mode, profile):
+    path = str(tmp_path / "search.trace")
+    problem = build_problem(dict(INSTANCE, mode=mode), "method1")
+    stats = SearchStats() if profile else None
+    recorded = list(record_search(problem, path, stats, keyframe_interval=3))
+    open_sizes = []
+    expected = expanded_nodes(build_problem(dict(INSTANCE, mode=mode), "method1"), open_sizes)
+    # 目标节点被生成两次，但只记录一次
+    assert recorded[-3] is recorded[-2]
+
+    reader = TraceReader(path)
+    try:
+        assert len(reader) == len(expected)
+        assert reader.mode == mode
+        for step, node in enumerate(expected):
+            record = reader.record(step)
+            assert record["g"] == node.depth
+            assert record["f"] == node.path_cost
+            assert record["action"] == node.action
+            assert record["open_size"] == open_sizes[step]
+            assert reader.state(step) == node.state
+    finally:
+        reader.close()
+
+def test_trace_readable_without_close(tmp_path):
+    """
+    录制未正常结束（文件头未补写）时，仍能按文件大小读出已写入的记录。
+    """
+    path = str(tmp_path / "partial.trace")
+    problem = build_problem(dict(INSTANCE, mode="mode1"), "method1")
+    writer = TraceWriter(path, problem)
+    nodes = expanded_nodes(problem)[:5]
+    for node in nodes:
+        writer.add(node)
+    writer.file.flush()
+
+    reader = TraceReader(path)
+    try:
+        assert len(reader) == len(nodes)
+        assert reader.state(len(nodes) - 1) == nodes[-1].state
+    finally:
+        reader.close()
+        writer.close()
+
+def test_parse_pairs():
+    pytest.importorskip("tkinter")
+    from CrossLine import parse_pairs
+
+    text = """
+    # 起点行 起点列 终点行 终点列
+    1 1 5 5
+    (1, 5) -> (3, 1)   # 括号和逗号
+    5,1,4,3
+    """
+    assert parse_pairs(text) == [[[1, 1], [5, 5]], [[1, 5], [3, 1]], [[5, 1], [4, 3]]]
+    assert parse_pairs("") == []
+    with pytest.raises(ValueError, match="Line 2"):
+        parse_pairs("1 1 2 2\n1 2 3\n")
@@ -0,0 +1,108 @@
+import pytest
+
+from CrossLineCLI import build_problem
+from CrossLineSolver import (
+    BitState, MatchProblem, Node, PriorityQueue, Problem, SearchStats, Set, State, anytime_search_generator,
+    search_generator, state_key,
+)
+
+class TurnProblem(Problem):
+    """
+    模拟 mode2 的小问题：状态 B 可由两条等长的边到达，最后方向（Node.dirs）不同，
+    从 B 到目标的成本取决于最后方向，因此去重键必须同时包含状态和方向。
+    A -> G 直接到达目标的成本为 10，A -> B 成本为 1；方向为 1 时 B -> G 成本为 1，否则为 3。
+    """
+    def __init__(self):
+        super().__init__("A")
+
+    def is_goal(self, state):
+        return state == "G"
+
+    def expand(self, node):
+        if node.state == "A":
+            return [Node("B", node, "x", 1, 0, 1), Node("B", node, "y", 1, 1, 1),
+                    Node("G", node, "g", 10, 0, 10)]
+        if node.state == "B":
+            cost = node.depth + (1 if node.dirs == 1 else 3)
+            return [Node("G", node, "g", cost, 0, cost)]
+        return []
+
+    def node_key(self, node):
+        return (node.state, node.dirs)
+
+def test_anytime_keeps_nodes_with_different_directions():
+    """
+    找到第一个解后重建的开放表同样按 problem.node_key 去重：
+    两个状态相同、方向不同的 B 节点都要保留，否则会丢失最优解却仍声称最优。
+    """
+    results = list(anytime_search_generator(TurnProblem(), weight=3.0))
+    goal, bound = results[-1]
+    assert goal.depth == 2
+    assert bound == 1.0
+
+def test_state_keys_survive_zobrist_collisions():
+    """
+    两个不同状态的 Zobrist 键相同时，开放表和关闭集合仍把它们当作不同状态。
+    """
+    first = State.initial(4, [[[0, 0], [3, 3]], [[0, 3], [3, 0]]])
+    moved = State(4, first.grid[:1] + b"\x01" + first.grid[2:], (1, first.heads[1]),
+                  first.ends, 0, key=first.key)
+    assert hash(first) == hash(moved)
+    assert state_key(first) != state_key(moved)
+
+    closed = Set()
+    closed.add(state_key(first))
+    assert not closed.include(state_key(moved))
+
+    openPQ = PriorityQueue()
+    openPQ.push(Node(first, path_cost=1))
+    openPQ.push(Node(moved, path_cost=2))
+    assert len(openPQ) == 2
+
+    # 内容相同的另一个状态对象是同一个键；位棋盘状态同样按完整内容比较
+    assert state_key(State(4, first.grid, first.heads, first.ends, first.active_line)) == first
+    assert BitState.from_state(first) != BitState.from_state(moved)
+    assert BitState.from_state(first) == BitState.from_state(State.initial(
+        4, [[[0, 0], [3, 3]], [[0, 3], [3, 0]]]))
+
+def test_released_state_rebuilds_without_recursion():
+    """
+    路径上所有祖先节点的状态都已释放时，深度超过递归限制的节点仍能重建状态。
+    """
+    n = 40
+    snake = [row * n + (col if row % 2 == 0 else n - 1 - col)
+             for row in range(n) for col in range(n)]
+    problem = MatchProblem(n, State.initial(n, [[[0, 0], [n - 1, 0]]]))
+    node = problem.init_state
+    for cell in snake[1:]:
+        child = node.child_node(problem, (0, cell))
+        node.release_state(problem)
+        node = child
+    expected = node.state
+    node.release_state(problem)
+    assert node.depth > 1500
+    assert node.state == expected
+
+@pytest.mark.parametrize("heuristic", ["method1", "distance_incremental"])
+@pytest.mark.parametrize("prune", [False, True])
+def test_profiled_search_matches_plain(heuristic, prune):
+    """
+    带插桩的搜索与普通搜索的出队顺序相同，且不修改 problem 的属性。
+    """
+    instance = {"n": 5, "mode": "mode2",
+                "pairs": [[[1, 1], [3, 5]], [[1, 5], [2, 2]], [[5, 1], [5, 5]]]}
+    plain = build_problem(instance, heuristic, prune=prune)
+    expected = [(node.path_cost, node.depth, node.state) for node in search_generator(plain)
+                if node is not None]
+
+    problem = build_problem(instance, heuristic, prune=prune)
+    attributes = dict(vars(problem))
+    stats = SearchStats()
+    nodes = [(node.path_cost, node.depth, node.state)
+             for node in search_generator(problem, stats) if node is not None]
+    assert nodes == expected
+    assert vars(problem).keys() == attributes.keys()
+    assert problem.h is attributes["h"]
+    assert stats.heuristic_calls == stats.generated
+    assert all(seconds >= 0 for seconds in stats.times.values())
+    assert stats.times["move"] > 0 and stats.times["heuristic"] > 0